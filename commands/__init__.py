@@ -0,0 +1,30 @@
+import importlib
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    Группа click, которая импортирует модуль подкоманды только при обращении к ней.
+    Подкоманды задаются словарем {имя: "модуль:атрибут"}, поэтому запуск
+    `python main.py status --help` не тянет за собой jinja2, requests, loguru и т.д.
+    """
+
+    def __init__(self, *args, lazy_commands: dict | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands:
+            return self._load_command(cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name):
+        module_name, attr_name = self.lazy_commands[cmd_name].split(":", 1)
+        command = getattr(importlib.import_module(module_name), attr_name)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"'{self.lazy_commands[cmd_name]}' не является командой click.")
+        return command
@@ -0,0 +1,86 @@
+import os
+
+import click
+
+
+@click.command()
+@click.option('--confirm', is_flag=True, help='Подтвердить удаление без запроса.')
+def destroy(confirm):
+    """
+    Удаляет все установленные сервисы (n8n, Supabase) и связанные данные/конфигурации.
+    Используйте --confirm для неинтерактивного удаления.
+    """
+    import json
+    import shutil
+    from loguru import logger
+
+    from utils import run_command
+    from config import AppConfig
+
+    logger.info("💥 Запускаем процесс удаления всех сервисов и данных...")
+
+    if not confirm:
+        if not click.confirm("Вы уверены, что хотите полностью удалить все сервисы (n8n, Supabase), их конфигурации и данные? Это действие необратимо!", abort=True):
+            logger.info("Отмена удаления.")
+            return
+
+    try:
+        # Сначала остановим и удалим n8n стек
+        logger.info("▶️ Останавливаем и удаляем n8n стек...")
+        try:
+            n8n_docker_compose_path = os.path.join(os.getcwd(), 'docker-compose.yml')
+            if os.path.exists(n8n_docker_compose_path):
+                run_command(["docker", "compose", "-f", n8n_docker_compose_path, "down", "-v", "--remove-orphans"])
+                logger.success("✅ Стек n8n остановлен и удалены тома.")
+                # Удаляем файлы конфигурации n8n
+                os.remove(n8n_docker_compose_path)
+                if os.path.exists('.env'):
+                    os.remove('.env')
+                logger.success("✅ Файлы конфигурации n8n удалены.")
+            else:
+                logger.info("Файл docker-compose.yml не найден. Пропуск удаления n8n.")
+        except Exception as e:
+            logger.warning(f"Ошибка при удалении n8n стека: {e}")
+
+        # Затем остановим и удалим Supabase стек
+        logger.info("▶️ Останавливаем и удаляем Supabase стек...")
+        try:
+            supabase_project_dir = os.path.join(os.getcwd(), 'supabase-project')
+            if os.path.exists(os.path.join(supabase_project_dir, 'docker-compose.yml')):
+                run_command(["docker", "compose", "-f", "docker-compose.yml", "down", "-v", "--remove-orphans"],
+                            cwd=supabase_project_dir)
+                logger.success("✅ Стек Supabase остановлен и удалены тома.")
+                # Удаляем директорию проекта Supabase
+                shutil.rmtree(supabase_project_dir, ignore_errors=True) # Игнорируем ошибки при удалении
+                logger.success("✅ Директория Supabase-project и связанные файлы удалены.")
+            else:
+                logger.info("Файл docker-compose.yml в supabase-project не найден. Пропуск удаления Supabase.")
+        except Exception as e:
+            logger.warning(f"Ошибка при удалении Supabase стека: {e}")
+
+        # Удаляем общую Docker сеть, если она не используется
+        config_instance = AppConfig()  # Создаем экземпляр для получения имени сети
+        network_name = config_instance.common_docker_network_name
+
+        # Кеши (.cache: разобранные .env, шаблоны) - после чтения настроек выше
+        shutil.rmtree(os.path.join(os.getcwd(), '.cache'), ignore_errors=True)
+        logger.info(f"▶️ Пытаемся удалить общую Docker сеть '{network_name}'...")
+        try:
+            inspect_result = run_command(["docker", "network", "inspect", network_name], capture_output=True, check=False)
+            if inspect_result.returncode == 0:  # Сеть существует
+                # Проверяем, что сеть не имеет присоединенных контейнеров (Ports - empty list or not present)
+                # Более надежный способ: анализировать JSON вывод docker network inspect
+                network_info = json.loads(inspect_result.stdout)[0]
+                if not network_info.get("Containers") and not network_info.get("Peers"):
+                    run_command(["docker", "network", "rm", network_name])
+                    logger.success(f"✅ Docker сеть '{network_name}' успешно удалена.")
+                else:
+                    logger.warning(f"⚠️ Docker сеть '{network_name}' все еще используется контейнерами или имеет пиры. Не удалена автоматически.")
+            else:
+                logger.info(f"Docker сеть '{network_name}' не существует. Ничего удалять.")
+        except Exception as e:
+            logger.warning(f"Ошибка при попытке удаления Docker сети: {e}")
+
+        logger.success("✅ Процесс удаления завершен.")
+    except Exception as e:
+        logger.error(f"❌ Ошибка при удалении сервисов: {e}")
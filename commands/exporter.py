@@ -0,0 +1,48 @@
+import os
+
+import click
+
+
+@click.command()
+@click.option('--listen', default=None,
+              help='Адрес HTTP сервера host:port (по умолчанию 127.0.0.1:EXPORTER_PORT).')
+@click.option('--ttl', type=float, default=None,
+              help='Сколько секунд отдавать закешированные метрики (по умолчанию EXPORTER_CACHE_TTL).')
+@click.option('--once', is_flag=True, help='Собрать метрики один раз, вывести их и завершиться.')
+def exporter(listen, ttl, once):
+    """
+    Экспортер метрик Prometheus для всего стека.
+
+    Параллельно опрашивает n8n (/metrics), Supavisor, Vector, обе базы Postgres
+    (pg_stat_statements, подключения, очередь эмбеддингов) и Docker (ресурсы контейнеров)
+    и отдает все одним ответом на /metrics. Результат кешируется на --ttl секунд.
+
+    С хоста доступны не все источники (Supavisor и Vector наружу не публикуются) -
+    полный набор метрик отдает сервис exporter (EXPORTER_ENABLED=true в supabase-project/.env).
+
+      python main.py exporter --once
+      python main.py exporter --listen 0.0.0.0:9188
+    """
+    from loguru import logger
+
+    from config import AppConfig
+    from exporter import Collector, get_endpoints, serve
+
+    config = AppConfig(skip_inputs=True)
+    in_network = os.environ.get("EXPORTER_IN_NETWORK", "").lower() == "true"
+    collector = Collector(config, get_endpoints(config, in_network),
+                          ttl=config.exporter_cache_ttl if ttl is None else ttl)
+
+    if once:
+        click.echo(collector.collect(), nl=False)
+        return
+
+    host, _, port = (listen or f"127.0.0.1:{config.exporter_port}").rpartition(":")
+    if not port.isdigit():
+        raise click.BadParameter(f"ожидается host:port, получено {listen}", param_hint='--listen')
+    try:
+        serve(collector, host or "0.0.0.0", int(port))
+    except OSError as e:
+        raise click.ClickException(f"Не удалось открыть {listen}: {e}")
+    except KeyboardInterrupt:
+        logger.info("⏹️ Экспортер остановлен.")
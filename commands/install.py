@@ -0,0 +1,98 @@
+import click
+
+
+@click.command()
+@click.option('--force', is_flag=True, help='Принудительно перезаписать существующие конфигурации и пропустить интерактивный ввод.')
+@click.option('--rebuild-image', is_flag=True, help='Пересобрать образ custom-n8n, даже если он уже есть на хосте.')
+def install(force, rebuild_image):
+    """
+    python main.py install -
+    python main.py destroy - Удаляет все установленные сервисы (n8n, Supabase) и связанные данные/конфигурации.
+    sudo rm -rf n8n_* supabase-project/
+
+    python main.py restart --stack n8n
+    python main.py restart --stack all
+    python main.py restart --stack n8n --resreate - Полностью пересоздать Supabase стек (удалить и пересоздать все тома)
+    python main.py restart --stack all --resreate
+
+    Устанавливает и настраивает все необходимые компоненты (n8n, Supabase).
+    Используйте --force, чтобы пропустить интерактивный ввод и использовать значения из .env или сгенерированные.
+    """
+    from loguru import logger
+
+    from config import AppConfig
+    from render import render_all
+    from setup_n8n import setup_n8n
+    from setup_supabase import seed_supabase_volumes, setup_supabase
+
+    logger.info("🚀 Запускаем процесс установки n8n + Supabase + RAG AI...")
+
+    try:
+        # Создаем экземпляр AppConfig. 'force' будет влиять на collect_user_inputs
+        config = AppConfig(skip_inputs=False)
+
+        # 1. Собираем все необходимые данные
+        logger.info("▶️ Собираем пользовательские данные или загружаем из .env...")
+        config.collect_user_inputs()
+        logger.success("✅ Пользовательские данные собраны/загружены.")
+
+        # 2. Генерируем все конфигурации (n8n, Supabase, nginx) за один проход
+        seed_supabase_volumes()
+        logger.info("▶️ Генерируем конфигурационные файлы из шаблонов...")
+        for target in render_all(config):
+            logger.info(f"  {target.template} -> {target.output}")
+        logger.success("✅ Конфигурационные файлы сгенерированы.")
+
+        # 3. Устанавливаем n8n стек
+        logger.info("\n▶️ Начинаем установку n8n стека...")
+        setup_n8n(config, rebuild_image=rebuild_image)
+        logger.success("✅ Стек n8n успешно установлен и запущен!")
+
+        # 4. Устанавливаем Supabase стек
+        logger.info("\n▶️ Начинаем установку Supabase стека...")
+        setup_supabase(config)
+        logger.success("✅ Стек Supabase успешно установлен и запущен!")
+
+        summary_text = f"""
+        🎉 Все компоненты (n8n, Supabase) успешно установлены и запущены!
+
+        ➡ Доступ к N8N: localhost:{config.n8n_host_port}
+          Web Hook Url N8N: {config.n8n_webhook_url}
+        
+        
+        ➡ Доступ к PGAdmin: http://0.0.0.0:{config.n8n_pgadmin_port}/login?next=/ 
+           Login: {config.n8n_pgadmin_email}
+           Pass:  {config.n8n_pgadmin_password}
+
+        ➡ Доступ к Postgres N8N:
+           HOST: n8n_postgres
+           DB:   {config.n8n_postgres_db}
+           User: {config.n8n_postgres_user}
+           Pass: {config.n8n_postgres_password}
+           Port: {config.n8n_postgres_port}
+           
+       ➡ Доступ к Postgres Supabase:
+           HOST: supabase-db
+           DB:   {config.supabase_postgres_db}
+           User: {config.supabase_dashboard_username}
+           Pass: {config.supabase_postgres_password}
+           Port: {config.supabase_postgres_port}     
+
+        ➡ Inbucket (почта): http://localhost:{config.n8n_inbucket_web_port}
+
+        ➡ Supabase Studio: http://localhost:{config.supabase_studio_port}
+           Login: {config.supabase_dashboard_username}
+           Pass:  {config.supabase_dashboard_password}
+        
+        - URL для подключения к Supabase - http://supabase-kong:8000 
+        🗝 Supabase SERVICE_ROLE_KEY: {config.supabase_service_role_key}
+        """
+        with open("summary.txt", "w", encoding="utf-8") as file:
+            file.write(summary_text.strip())
+
+        logger.success("\n🎉 Все компоненты (n8n, Supabase) успешно установлены и запущены!")
+        logger.info(summary_text)
+
+    except Exception as e:
+        logger.error(f"❌ Произошла критическая ошибка во время установки: {e}")
+        logger.error("Пожалуйста, проверьте логи выше для получения дополнительной информации.")
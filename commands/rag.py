@@ -0,0 +1,179 @@
+import click
+
+
+@click.group()
+def rag():
+    """
+    RAG в Supabase: схема documents и очередь заданий на вычисление эмбеддингов.
+
+    Вставка или изменение строки в public.documents ставит задание в очередь rag.embedding_jobs
+    (триггером), а воркер вычисляет эмбеддинги пачками и записывает их обратно.
+    n8n может вставлять документы без эмбеддингов - задержка вебхука больше не включает
+    обращение к API эмбеддингов.
+
+      python main.py rag worker --concurrency 8
+      python main.py rag queue
+    """
+
+
+@rag.command()
+def schema():
+    """Применяет схему RAG (documents, match_documents, очередь и триггеры) к Supabase."""
+    from loguru import logger
+
+    from config import AppConfig
+    from render import SUPABASE_TARGETS, render_all
+    from setup_supabase import apply_rag_schema
+
+    config = AppConfig(skip_inputs=True)
+    try:
+        render_all(config, targets=[t for t in SUPABASE_TARGETS if t.template == "supabase_rag_sql.j2"])
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        raise SystemExit(2)
+    apply_rag_schema(config)
+
+
+@rag.command()
+@click.option('--dsn', default=None, help='Строка подключения (по умолчанию - пулер Supabase текущего стека).')
+@click.option('--batch-size', type=int, default=100, show_default=True, help='Заданий, забираемых за раз.')
+@click.option('--request-size', type=int, default=64, show_default=True, help='Текстов в одном запросе к API.')
+@click.option('--concurrency', type=int, default=4, show_default=True,
+              help='Максимум одновременных запросов к API эмбеддингов.')
+@click.option('--poll-interval', type=float, default=2, show_default=True, help='Пауза при пустой очереди, с.')
+@click.option('--once', is_flag=True, help='Завершиться, когда очередь опустеет.')
+def worker(dsn, batch_size, request_size, concurrency, poll_interval, once):
+    """
+    Вычисляет эмбеддинги документов из очереди.
+
+    Задания забираются пачками через FOR UPDATE SKIP LOCKED, поэтому пропускная способность
+    растет с числом запущенных воркеров. Неудачные задания повторяются с экспоненциальной
+    задержкой, а после RAG_QUEUE_MAX_ATTEMPTS попыток переносятся в rag.embedding_jobs_dead.
+    """
+    from loguru import logger
+
+    from config import AppConfig
+    from db import pooler_dsn
+    from rag import Embedder, run_worker
+
+    config = AppConfig(skip_inputs=True)
+    if not config.rag_embedding_api_key:
+        logger.warning("⚠️ RAG_EMBEDDING_API_KEY (или SUPABASE_OPENAI_API_KEY) не задан, запросы идут без авторизации.")
+
+    embedder = Embedder(config.rag_embedding_api_url, config.rag_embedding_model, config.rag_embedding_dim,
+                        api_key=config.rag_embedding_api_key, request_size=request_size, concurrency=concurrency)
+    logger.info(f"▶️ Воркер эмбеддингов: модель {config.rag_embedding_model}, пачка {batch_size}, "
+                f"параллельно {concurrency} запросов")
+    try:
+        processed, failed = run_worker(dsn or pooler_dsn(config), embedder, batch_size=batch_size,
+                                       max_attempts=config.rag_queue_max_attempts,
+                                       poll_interval=poll_interval, once=once)
+    except KeyboardInterrupt:
+        logger.info("⏹️ Воркер остановлен.")
+        return
+    logger.success(f"✅ Очередь пуста: обработано {processed}, с ошибкой {failed}.")
+
+
+@rag.command()
+@click.option('--dsn', default=None, help='Строка подключения (по умолчанию - пулер Supabase текущего стека).')
+@click.option('--retry-dead', is_flag=True, help='Вернуть задания из dead letter в очередь.')
+def queue(dsn, retry_dead):
+    """Показывает глубину очереди эмбеддингов."""
+    from config import AppConfig
+    from db import connect, pooler_dsn
+    from rag import queue_stats, retry_dead as requeue
+
+    with connect(dsn or pooler_dsn(AppConfig(skip_inputs=True)), autocommit=True) as conn:
+        if retry_dead:
+            click.echo(f"Возвращено в очередь: {requeue(conn)}")
+        stats = queue_stats(conn)
+    click.echo(f"ожидают: {stats['ready']}  в работе: {stats['in_progress']}  dead letter: {stats['dead']}  "
+               f"старейшее: {stats['oldest_age']:.0f} с")
+
+
+@rag.group()
+def collection():
+    """
+    Коллекции (базы знаний) в public.documents: у каждой своя секция и свой векторный индекс.
+
+    Поиск с match_documents(..., collection => 'kb') или filter {"collection": "kb"}
+    затрагивает только секцию коллекции. Документы коллекций без секции хранятся в documents_default.
+
+      python main.py rag collection attach kb
+      python main.py rag collection drop kb
+    """
+
+
+def _connect_rag(dsn):
+    from config import AppConfig
+    from db import connect, pooler_dsn
+
+    return connect(dsn or pooler_dsn(AppConfig(skip_inputs=True)), autocommit=True)
+
+
+@collection.command(name="list")
+@click.option('--dsn', default=None, help='Строка подключения (по умолчанию - пулер Supabase текущего стека).')
+def list_collections(dsn):
+    """Показывает коллекции, их состояние и размер."""
+    from rag import list_collections as collections
+
+    with _connect_rag(dsn) as conn:
+        rows = collections(conn)
+    click.echo(f"{'коллекция':<40}{'состояние':>12}{'строк ~':>12}{'размер, МБ':>12}")
+    for name, attached, rows_estimate, size in rows:
+        click.echo(f"{name:<40}{'подключена' if attached else 'отключена':>12}{rows_estimate:>12}"
+                   f"{size / 2 ** 20:>12.1f}")
+
+
+@collection.command()
+@click.argument('name')
+@click.option('--dsn', default=None, help='Строка подключения (по умолчанию - пулер Supabase текущего стека).')
+def attach(name, dsn):
+    """Создает секцию коллекции NAME (или подключает ранее отключенную)."""
+    from loguru import logger
+
+    from rag import attach_collection
+
+    with _connect_rag(dsn) as conn:
+        try:
+            count = attach_collection(conn, name)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    logger.success(f"✅ Коллекция '{name}' подключена ({count} документов).")
+
+
+@collection.command()
+@click.argument('name')
+@click.option('--dsn', default=None, help='Строка подключения (по умолчанию - пулер Supabase текущего стека).')
+def detach(name, dsn):
+    """Отключает коллекцию NAME от поиска, сохраняя ее документы в отдельной таблице."""
+    from loguru import logger
+
+    from rag import detach_collection
+
+    with _connect_rag(dsn) as conn:
+        try:
+            detach_collection(conn, name)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    logger.success(f"✅ Коллекция '{name}' отключена (таблица public.documents_{name}).")
+
+
+@collection.command()
+@click.argument('name')
+@click.option('--dsn', default=None, help='Строка подключения (по умолчанию - пулер Supabase текущего стека).')
+@click.option('--confirm', is_flag=True, help='Подтвердить удаление без запроса.')
+def drop(name, dsn, confirm):
+    """Удаляет коллекцию NAME со всеми документами."""
+    from loguru import logger
+
+    from rag import drop_collection
+
+    if not confirm:
+        click.confirm(f"Удалить коллекцию '{name}' со всеми документами? Это действие необратимо!", abort=True)
+    with _connect_rag(dsn) as conn:
+        try:
+            drop_collection(conn, name)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    logger.success(f"✅ Коллекция '{name}' удалена.")
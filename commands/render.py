@@ -0,0 +1,41 @@
+import click
+
+
+@click.command()
+@click.option('--dry-run', is_flag=True, help='Сгенерировать файлы во временную директорию и показать отличия от текущих.')
+def render(dry_run):
+    """
+    Генерирует все конфигурационные файлы (docker-compose, .env, kong.yml, vector.yml,
+    jwt.sql, nginx) из шаблонов за один проход, используя значения из окружения и .env.
+
+    Секреты не генерируются: команда предназначена для уже установленного стека.
+
+      python main.py render --dry-run
+      python main.py render
+    """
+    from loguru import logger
+
+    from config import AppConfig
+    from render import diff_rendered, render_all
+
+    config = AppConfig(skip_inputs=True)
+    errors = config.validate()
+    if errors:
+        for error in errors:
+            logger.error(f"❌ {error}")
+        raise SystemExit(2)
+
+    if not dry_run:
+        for target in render_all(config):
+            logger.info(f"  {target.template} -> {target.output}")
+        logger.success("✅ Конфигурационные файлы сгенерированы.")
+        return
+
+    diffs = diff_rendered(config)
+    if not diffs:
+        logger.success("✅ Сгенерированные файлы совпадают с текущими.")
+        return
+    for output, diff in diffs.items():
+        logger.warning(f"⚠️ {output} отличается от шаблона")
+        click.echo(diff)
+    raise SystemExit(1)
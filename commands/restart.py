@@ -0,0 +1,81 @@
+import os
+
+import click
+
+
+@click.command()
+@click.option('--stack', type=click.Choice(['n8n', 'supabase', 'all']), default='all', help="""
+Указывает, какой стек перезапустить:
+
+- n8n — только стек n8n (n8n, PostgreSQL, PgAdmin, Inbucket, Cloudflare Tunnel).
+- supabase — только стек Supabase (Supabase Studio, API, DB и т.д.).
+- all — перезапустить оба стека.
+
+Пример:
+  python main.py restart --stack n8n
+""")
+@click.option('--recreate', is_flag=True, help="""
+Пересоздаёт контейнеры и тома (выполняет `docker compose down -v && up -d`).
+⚠️ Все связанные тома и данные будут удалены.
+
+Пример:
+  python main.py restart --stack supabase --recreate
+""")
+def restart(stack, recreate):
+    """
+    Перезапускает выбранный стек Docker (n8n, Supabase или оба).
+
+    Эта команда позволяет быстро перезапустить сервисы без полной переустановки,
+    а также пересоздать их с нуля при необходимости.
+
+    Примеры использования:
+
+    ▸ Перезапустить только n8n (без удаления данных):
+      python main.py restart --stack n8n
+
+    ▸ Полностью пересоздать Supabase стек (удалить и пересоздать все тома):
+      python main.py restart --stack supabase --recreate
+
+    ▸ Перезапустить всё (n8n + Supabase), сохранив данные:
+      python main.py restart --stack all
+
+    ▸ Пересоздать всё с нуля:
+      python main.py restart --stack all --recreate
+    """
+    from loguru import logger
+
+    from utils import run_command
+    from config import AppConfig
+
+    config = AppConfig()
+    stack_paths = {
+        "n8n": os.path.join(os.getcwd(), "docker-compose.yml"),
+        "supabase": os.path.join(os.getcwd(), "supabase-project", "docker-compose.yml"),
+    }
+
+    if recreate:
+        confirm = click.confirm(
+            f"Вы действительно хотите пересоздать стек '{stack}' с удалением томов (это удалит ВСЕ ДАННЫЕ)?",
+            abort=True
+        )
+        logger.warning("⚠️ Перезапуск будет выполнен с удалением всех данных (docker compose down -v)")
+
+    def restart_stack(name, compose_path):
+        if not os.path.exists(compose_path):
+            logger.warning(f"⚠️ Docker Compose файл для {name} не найден по пути: {compose_path}")
+            return
+        try:
+            args_down = ["docker", "compose", "-f", compose_path, "down"]
+            if recreate:
+                args_down.append("-v")
+            run_command(args_down, cwd=os.path.dirname(compose_path))
+            logger.info(f"⬆️ Запускаем стек {name}...")
+            run_command(["docker", "compose", "-f", compose_path, "up", "-d"], cwd=os.path.dirname(compose_path))
+            logger.success(f"✅ Стек {name} успешно перезапущен!")
+        except Exception as e:
+            logger.error(f"❌ Ошибка при перезапуске стека {name}: {e}")
+
+    if stack in ("n8n", "all"):
+        restart_stack("n8n", stack_paths["n8n"])
+    if stack in ("supabase", "all"):
+        restart_stack("supabase", stack_paths["supabase"])
@@ -0,0 +1,78 @@
+import os
+
+import click
+
+
+@click.command()
+@click.option('--stack', type=click.Choice(['n8n', 'supabase', 'all']), default='all',
+              help='Для какого стека показать состояние контейнеров.')
+@click.option('--verify/--no-verify', default=False, show_default=True,
+              help='Проверить, что сгенерированные файлы соответствуют шаблонам и текущим настройкам '
+                   '(полный рендеринг шаблонов, поэтому не по умолчанию).')
+def status(stack, verify):
+    """
+    Показывает состояние контейнеров стеков (docker compose ps)
+    и отставание реплики базы Supabase, если она включена.
+
+    Команда не трогает конфигурацию и предназначена для частого вызова
+    из скриптов мониторинга:
+
+    \b
+      python main.py status --stack supabase
+      python main.py status --verify
+    """
+    from loguru import logger
+
+    from utils import run_command
+    from config import AppConfig
+
+    stack_paths = {
+        "n8n": os.path.join(os.getcwd(), "docker-compose.yml"),
+        "supabase": os.path.join(os.getcwd(), "supabase-project", "docker-compose.yml"),
+    }
+
+    for name, compose_path in stack_paths.items():
+        if stack not in (name, "all"):
+            continue
+        if not os.path.exists(compose_path):
+            logger.warning(f"⚠️ Docker Compose файл для {name} не найден по пути: {compose_path}")
+            continue
+        logger.info(f"▶️ Состояние стека {name}:")
+        try:
+            run_command(["docker", "compose", "-f", compose_path, "ps"], cwd=os.path.dirname(compose_path),
+                        capture_output=False)
+        except Exception as e:
+            logger.error(f"❌ Не удалось получить состояние стека {name}: {e}")
+
+    config = AppConfig(skip_inputs=True)
+    if stack in ("supabase", "all") and config.supabase_replica_enabled and os.path.exists(stack_paths["supabase"]):
+        from replication import replication_lag
+
+        try:
+            rows = replication_lag(config)
+        except Exception as e:
+            logger.error(f"❌ Не удалось получить состояние репликации: {e}")
+        else:
+            if not rows:
+                logger.warning(f"⚠️ Слот репликации {config.supabase_replication_slot} не найден.")
+            for slot, state, lag_bytes, lag_seconds in rows:
+                lag = "н/д" if lag_bytes is None else f"{lag_bytes / 2 ** 20:.1f} МБ"
+                replay = "" if lag_seconds is None else f", replay_lag {lag_seconds:.2f} с"
+                logger.info(f"▶️ Реплика ({slot}): {state}, отставание {lag}{replay}")
+
+    if not verify or not any(os.path.exists(path) for path in stack_paths.values()):
+        return
+
+    from render import diff_rendered
+
+    errors = config.validate()
+    if errors:
+        for error in errors:
+            logger.warning(f"⚠️ {error}")
+        return
+    diffs = diff_rendered(config)
+    if diffs:
+        logger.warning(f"⚠️ Файлы расходятся с шаблонами: {', '.join(diffs)}. "
+                       f"Подробности: python main.py render --dry-run")
+    else:
+        logger.success("✅ Сгенерированные файлы соответствуют шаблонам.")
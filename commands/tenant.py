@@ -0,0 +1,95 @@
+import os
+
+import click
+
+
+@click.group()
+def tenant():
+    """
+    Управление тенантами: несколькими изолированными стеками n8n + Supabase на одном хосте.
+
+    Каждый тенант живет в tenants/<имя>/ со своими контейнерами, сетью, томами и портами,
+    а образы (включая собранный custom-n8n) общие для всех стеков.
+
+      python main.py tenant create acme --install
+      python main.py --tenant acme status
+      python main.py tenant destroy acme
+    """
+
+
+@tenant.command(name="list")
+def list_tenants():
+    """Показывает зарегистрированных тенантов и выделенные им порты."""
+    from tenants import load_registry, tenant_dir
+
+    registry = load_registry()
+    if not registry:
+        click.echo("Тенантов нет. Создайте: python main.py tenant create <имя>")
+        return
+    click.echo(f"{'тенант':<20}{'n8n':>7}{'pgadmin':>9}{'kong':>7}{'supabase db':>13}{'pooler':>8}  создан")
+    for name, entry in sorted(registry.items()):
+        ports = entry["ports"]
+        missing = "" if os.path.isdir(tenant_dir(name)) else "  (директория отсутствует)"
+        click.echo(f"{name:<20}{ports['n8n_host_port']:>7}{ports['n8n_pgadmin_port']:>9}"
+                   f"{ports['supabase_kong_http_port']:>7}{ports['supabase_postgres_port']:>13}"
+                   f"{ports['supabase_pooler_proxy_port_transaction']:>8}  {entry['created_at']}{missing}")
+
+
+@tenant.command()
+@click.argument('name')
+@click.option('--install', 'run_install', is_flag=True, help='Сразу выполнить установку стека тенанта.')
+@click.pass_context
+def create(ctx, name, run_install):
+    """Регистрирует тенанта NAME и выделяет ему свободные порты."""
+    from loguru import logger
+
+    from tenants import create_tenant, enter_tenant, tenant_dir
+
+    try:
+        entry = create_tenant(name)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    logger.success(f"✅ Тенант '{name}' создан в {tenant_dir(name)}")
+    for field, port in entry["ports"].items():
+        logger.info(f"  {field}: {port}")
+
+    if run_install:
+        from commands.install import install
+
+        enter_tenant(name)
+        ctx.invoke(install)
+    else:
+        logger.info(f"Установка стека: python main.py --tenant {name} install")
+
+
+@tenant.command()
+@click.argument('name')
+@click.option('--confirm', is_flag=True, help='Подтвердить удаление без запроса.')
+@click.pass_context
+def destroy(ctx, name, confirm):
+    """Останавливает стек тенанта NAME, удаляет его данные и освобождает порты."""
+    from loguru import logger
+
+    from commands.destroy import destroy as destroy_stack
+    from tenants import enter_tenant, load_registry, remove_tenant, tenant_dir, PROJECT_ROOT
+
+    if name not in load_registry():
+        raise click.ClickException(f"Тенант '{name}' не найден.")
+    if not confirm:
+        click.confirm(f"Удалить тенанта '{name}' со всеми контейнерами и данными? Это действие необратимо!",
+                      abort=True)
+
+    if os.path.isdir(tenant_dir(name)):
+        try:
+            enter_tenant(name)
+            ctx.invoke(destroy_stack, confirm=True)
+        except ValueError as e:
+            logger.warning(f"⚠️ {e}")
+        finally:
+            os.chdir(PROJECT_ROOT)
+
+    remove_tenant(name)
+    if os.path.exists(tenant_dir(name)):
+        logger.warning(f"⚠️ Не удалось полностью удалить {tenant_dir(name)} (файлы контейнеров принадлежат root?)")
+    logger.success(f"✅ Тенант '{name}' удален.")
@@ -1,117 +1,399 @@
 import os
 import secrets
 import string
-import click
-import getpass
 import base64
 import hashlib
 import hmac
 import time
 import json
-import jwt
-from dotenv import load_dotenv
-from loguru import logger
+import re
+from typing import Any, NamedTuple
+from urllib.parse import urlparse
 
 from utils import generate_random_string
 
 
+class ConfigError(ValueError):
+    """Некорректное значение настройки (неверный тип, недопустимое значение и т.п.)."""
+
+
+# Шаблоны (templates/*.j2), в которые пробрасываются поля конфигурации
+N8N_COMPOSE = ("n8n_docker_compose_local.j2", "n8n_docker_compose_vps.j2")
+N8N_ENV = ("n8n_env_local.j2", "n8n_env_vps.j2")
+NGINX_VPS = ("nginx_conf_d_vps.j2",)
+SUPABASE_ENV = ("supabase_env.j2",)
+SUPABASE_COMPOSE = ("supabase_docker_compose.j2",)
+SUPABASE_KONG = ("supabase_kong.j2",)
+SUPABASE_VECTOR = ("supabase_vector.j2",)
+SUPABASE_JWT = ("supabase_jwt_sql.j2",)
+SUPABASE_RAG = ("supabase_rag_sql.j2",)
+SUPABASE_REPLICATION = ("supabase_replication_sql.j2", "supabase_pg_hba.j2", "supabase_pooler_replica.j2")
+SUPABASE_STACK = SUPABASE_ENV + SUPABASE_COMPOSE
+
+
+class ConfigField(NamedTuple):
+    """
+    Описание поля AppConfig.
+    default может быть функцией от конфигурации - тогда поле вычисляемое и не кешируется.
+    """
+    env: str | None  # Имя переменной окружения (None - значение берется только из default)
+    default: Any
+    type: type = str
+    var: str | None = None  # Имя переменной в шаблонах (по умолчанию совпадает с env)
+    templates: tuple = ()  # Шаблоны, в которых доступна переменная
+    required: bool = False  # Должно быть заполнено перед генерацией конфигураций
+    choices: tuple = ()
+    pattern: str | None = None  # Регулярное выражение для непустых значений
+
+    @property
+    def template_var(self) -> str | None:
+        return self.var or self.env
+
+
+# Декларативная схема всех полей AppConfig. Значения вычисляются лениво, при первом обращении к полю.
+CONFIG_SCHEMA = {
+    # Тенант: несколько изолированных стеков на одном хосте (см. tenants.py)
+    "tenant": ConfigField("TENANT", "", pattern=r"[a-z0-9][a-z0-9_-]{0,30}"),
+    "container_prefix": ConfigField(None, lambda c: f"{c.tenant}_" if c.tenant else "", var="CONTAINER_PREFIX",
+                                    templates=N8N_COMPOSE + SUPABASE_COMPOSE + SUPABASE_VECTOR),
+    "compose_project_prefix": ConfigField(None, lambda c: f"{c.tenant}-" if c.tenant else "",
+                                          var="COMPOSE_PROJECT_PREFIX",
+                                          templates=N8N_COMPOSE + SUPABASE_COMPOSE + SUPABASE_VECTOR),
+
+    # N8N
+    "server": ConfigField(None, "local", choices=("local", "vps")),
+    "n8n_postgres_password": ConfigField("N8N_POSTGRES_PASSWORD", "", templates=N8N_ENV, required=True),
+    "n8n_pgadmin_password": ConfigField("N8N_PGADMIN_PASSWORD", "", templates=N8N_ENV, required=True),
+    "n8n_openai_api_key": ConfigField("N8N_OPENAI_API_KEY", "", templates=N8N_ENV),
+    "n8n_host_port": ConfigField("N8N_HOST_PORT", 5678, int, templates=N8N_COMPOSE),
+    "n8n_pgadmin_port": ConfigField("N8N_PGADMIN_PORT", 5051, int, templates=N8N_COMPOSE),
+    "n8n_inbucket_web_port": ConfigField("N8N_INBUCKET_WEB_PORT", 9000, int, templates=N8N_COMPOSE),
+    "n8n_inbucket_smtp_port": ConfigField("N8N_INBUCKET_SMTP_PORT", 25000, int, templates=N8N_COMPOSE),
+    "n8n_inbucket_pop3_port": ConfigField("N8N_INBUCKET_POP3_PORT", 1100, int, templates=N8N_COMPOSE),
+    "n8n_file_permissions": ConfigField("N8N_ENFORCE_SETTINGS_FILE_PERMISSIONS", "false", templates=N8N_COMPOSE),
+    "n8n_postgres_user": ConfigField("N8N_POSTGRES_USER", "n8n_pg_user", templates=N8N_COMPOSE),
+    "n8n_postgres_db": ConfigField("N8N_POSTGRES_DATABASE", "n8n_pg_db", templates=N8N_COMPOSE),
+    "n8n_postgres_type": ConfigField(None, "postgresdb", var="N8N_POSTGRES_TYPE", templates=N8N_COMPOSE),
+    "n8n_postgres_host": ConfigField(None, "n8n_postgres", var="N8N_POSTGRES_HOST", templates=N8N_COMPOSE),
+    "n8n_pgadmin_email": ConfigField("N8N_PGADMIN_EMAIL", "admin@example.com", templates=N8N_COMPOSE),
+    "n8n_generic_timezone": ConfigField("N8N_GENERIC_TIMEZONE", "Europe/Moscow", templates=N8N_COMPOSE),
+    "cloudflare_tunnel_token": ConfigField("CLOUDFLARE_TUNNEL_TOKEN", "", templates=N8N_ENV),
+    "n8n_webhook_url": ConfigField("N8N_WEBHOOK_URL", "", templates=N8N_COMPOSE + N8N_ENV, required=True),
+    "n8n_host": ConfigField(None, lambda c: urlparse(c.n8n_webhook_url).netloc, var="N8N_HOST",
+                            templates=N8N_ENV + NGINX_VPS),
+    "n8n_postgres_port": ConfigField("N8N_POSTGRES_PORT", "", templates=N8N_COMPOSE + N8N_ENV, required=True),
+    # В .env n8n пишется N8N_EDITOR_BASE_URL=<webhook url>, поэтому значение из окружения здесь не читается
+    "n8n_editor_base_url": ConfigField(None, lambda c: f"http://localhost:{c.n8n_host_port}",
+                                       var="N8N_EDITOR_BASE_URL", templates=N8N_COMPOSE),
+
+    # Supabase
+    "supabase_postgres_password": ConfigField("SUPABASE_POSTGRES_PASSWORD", None, templates=SUPABASE_ENV,
+                                              required=True),
+    "supabase_jwt_secret": ConfigField("SUPABASE_JWT_SECRET", None, templates=SUPABASE_ENV + SUPABASE_JWT,
+                                       required=True),
+    "supabase_anon_key": ConfigField("SUPABASE_ANON_KEY", None, templates=SUPABASE_ENV + SUPABASE_KONG,
+                                     required=True),
+    "supabase_service_role_key": ConfigField("SUPABASE_SERVICE_ROLE_KEY", None,
+                                             templates=SUPABASE_ENV + SUPABASE_KONG, required=True),
+    "supabase_dashboard_username": ConfigField("SUPABASE_DASHBOARD_USERNAME", "supabase-admin",
+                                               templates=SUPABASE_STACK + SUPABASE_KONG),
+    "supabase_dashboard_password": ConfigField("SUPABASE_DASHBOARD_PASSWORD", None,
+                                               templates=SUPABASE_ENV + SUPABASE_KONG, required=True),
+    "supabase_secret_key_base": ConfigField("SUPABASE_SECRET_KEY_BASE", None, templates=SUPABASE_ENV,
+                                            required=True),
+    "supabase_vault_enc_key": ConfigField("SUPABASE_VAULT_ENC_KEY", None, templates=SUPABASE_ENV, required=True),
+
+    "supabase_postgres_username": ConfigField(None, "supabase-pg_admin", var="SUPABASE_POSTGRES_USERNAME",
+                                              templates=SUPABASE_ENV),
+    "supabase_postgres_host": ConfigField("SUPABASE_POSTGRES_HOST", "db", templates=SUPABASE_STACK),  # Внутри Docker Compose
+    "supabase_postgres_port": ConfigField("SUPABASE_POSTGRES_PORT", 5435, int, templates=SUPABASE_STACK),  # Внутренний порт DB
+    "supabase_postgres_db": ConfigField("SUPABASE_POSTGRES_DB", "postgres", templates=SUPABASE_STACK),
+
+    "supabase_pooler_proxy_port_transaction": ConfigField("SUPABASE_POOLER_PROXY_PORT_TRANSACTION", 6543, int,
+                                                          templates=SUPABASE_STACK),
+    "supabase_pooler_default_pool_size": ConfigField("SUPABASE_POOLER_DEFAULT_POOL_SIZE", 20, int,
+                                                     templates=SUPABASE_STACK),
+    "supabase_pooler_max_client_conn": ConfigField("SUPABASE_POOLER_MAX_CLIENT_CONN", 100, int,
+                                                   templates=SUPABASE_STACK),
+    "supabase_pooler_tenant_id": ConfigField("SUPABASE_POOLER_TENANT_ID", "default", templates=SUPABASE_STACK),
+
+    "supabase_kong_http_port": ConfigField("SUPABASE_KONG_HTTP_PORT", 8000, int, templates=SUPABASE_STACK),
+    "supabase_kong_https_port": ConfigField("SUPABASE_KONG_HTTPS_PORT", 8443, int, templates=SUPABASE_STACK),
+    "supabase_analytics_port": ConfigField("SUPABASE_ANALYTICS_PORT", 4000, int, templates=SUPABASE_COMPOSE),
+
+    "supabase_pgrst_db_schemas": ConfigField("SUPABASE_PGRST_DB_SCHEMAS", "public,storage,graphql_public",
+                                             templates=SUPABASE_STACK),
+
+    "supabase_url": ConfigField("SUPABASE_URL", "http://supabase-kong:8000", templates=SUPABASE_ENV),
+    "supabase_site_url": ConfigField("SUPABASE_SITE_URL", "http://localhost:8000", templates=SUPABASE_STACK),
+    "supabase_additional_redirect_urls": ConfigField("SUPABASE_ADDITIONAL_REDIRECT_URLS", "",
+                                                     templates=SUPABASE_STACK),
+    "supabase_jwt_expiry": ConfigField("SUPABASE_JWT_EXPIRY", 3600, int, templates=SUPABASE_STACK + SUPABASE_JWT),
+    "supabase_disable_signup": ConfigField("SUPABASE_DISABLE_SIGNUP", "false", bool, templates=SUPABASE_STACK),
+    "supabase_api_external_url": ConfigField("SUPABASE_API_EXTERNAL_URL", "http://localhost:8000",
+                                             templates=SUPABASE_STACK),
+
+    "supabase_mailer_urlpaths_confirmation": ConfigField("SUPABASE_MAILER_URLPATHS_CONFIRMATION", "/auth/v1/verify",
+                                                         templates=SUPABASE_STACK),
+    "supabase_mailer_urlpaths_invite": ConfigField("SUPABASE_MAILER_URLPATHS_INVITE", "/auth/v1/verify",
+                                                   templates=SUPABASE_STACK),
+    "supabase_mailer_urlpaths_recovery": ConfigField("SUPABASE_MAILER_URLPATHS_RECOVERY", "/auth/v1/verify",
+                                                     templates=SUPABASE_STACK),
+    "supabase_mailer_urlpaths_email_change": ConfigField("SUPABASE_MAILER_URLPATHS_EMAIL_CHANGE", "/auth/v1/verify",
+                                                         templates=SUPABASE_STACK),
+
+    "supabase_enable_email_signup": ConfigField("SUPABASE_ENABLE_EMAIL_SIGNUP", "true", bool,
+                                                templates=SUPABASE_STACK),
+    "supabase_enable_email_autoconfirm": ConfigField("SUPABASE_ENABLE_EMAIL_AUTOCONFIRM", "false", bool,
+                                                     templates=SUPABASE_STACK),
+    "supabase_smtp_admin_email": ConfigField("SUPABASE_SMTP_ADMIN_EMAIL", "admin@example.com",
+                                             templates=SUPABASE_STACK),
+    "supabase_smtp_host": ConfigField("SUPABASE_SMTP_HOST", "supabase-mail", templates=SUPABASE_STACK),
+    "supabase_smtp_port": ConfigField("SUPABASE_SMTP_PORT", 2500, int, templates=SUPABASE_STACK),
+    "supabase_smtp_user": ConfigField("SUPABASE_SMTP_USER", "fake_mail_user", templates=SUPABASE_STACK),
+    "supabase_smtp_pass": ConfigField("SUPABASE_SMTP_PASS", "fake_mail_password", templates=SUPABASE_ENV),
+    "supabase_smtp_sender_name": ConfigField("SUPABASE_SMTP_SENDER_NAME", "Supabase", templates=SUPABASE_STACK),
+    "supabase_enable_anonymous_users": ConfigField("SUPABASE_ENABLE_ANONYMOUS_USERS", "false", bool,
+                                                   templates=SUPABASE_STACK),
+
+    "supabase_enable_phone_signup": ConfigField("SUPABASE_ENABLE_PHONE_SIGNUP", "true", bool,
+                                                templates=SUPABASE_STACK),
+    "supabase_enable_phone_autoconfirm": ConfigField("SUPABASE_ENABLE_PHONE_AUTOCONFIRM", "true", bool,
+                                                     templates=SUPABASE_STACK),
+
+    "supabase_studio_default_organization": ConfigField("SUPABASE_STUDIO_DEFAULT_ORGANIZATION", "Default Organization",
+                                                        templates=SUPABASE_STACK),
+    "supabase_studio_default_project": ConfigField("SUPABASE_STUDIO_DEFAULT_PROJECT", "Default Project",
+                                                   templates=SUPABASE_STACK),
+
+    "supabase_studio_port": ConfigField("SUPABASE_STUDIO_PORT", 8000, int, templates=SUPABASE_ENV),
+    "supabase_public_url": ConfigField("SUPABASE_PUBLIC_URL", "http://localhost:8000", templates=SUPABASE_STACK),
+
+    "supabase_imgproxy_enable_webp_detection": ConfigField("SUPABASE_IMGPROXY_ENABLE_WEBP_DETECTION", "true", bool,
+                                                           templates=SUPABASE_STACK),
+
+    "supabase_openai_api_key": ConfigField("SUPABASE_OPENAI_API_KEY", "", templates=SUPABASE_ENV),
+
+    "supabase_functions_verify_jwt": ConfigField("SUPABASE_FUNCTIONS_VERIFY_JWT", "false", bool,
+                                                 templates=SUPABASE_STACK),
+
+    "supabase_logfkare_logger_backend_api_key": ConfigField("LOGFLARE_API_KEY", None),
+    "supabase_logflare_api_key": ConfigField("LOGFLARE_API_KEY", None, templates=SUPABASE_ENV + SUPABASE_VECTOR,
+                                             required=True),
+
+    "supabase_docker_socket_location": ConfigField("SUPABASE_DOCKER_SOCKET_LOCATION", "/var/run/docker.sock",
+                                                   templates=SUPABASE_STACK),
+
+    "supabase_google_project_id": ConfigField("SUPABASE_GOOGLE_PROJECT_ID", "", templates=SUPABASE_STACK),
+    "supabase_google_project_number": ConfigField("SUPABASE_GOOGLE_PROJECT_NUMBER", "", templates=SUPABASE_STACK),
+    "supabase_db_enc_key": ConfigField("SUPABASE_DB_ENC_KEY", "", templates=SUPABASE_ENV, required=True),
+
+    # RAG: эмбеддинги документов вычисляет воркер очереди (см. rag.py), API совместим с OpenAI /v1/embeddings
+    "rag_embedding_dim": ConfigField("RAG_EMBEDDING_DIM", 1536, int, templates=SUPABASE_ENV + SUPABASE_RAG),
+    "rag_embedding_model": ConfigField("RAG_EMBEDDING_MODEL", "text-embedding-3-small", templates=SUPABASE_ENV),
+    "rag_embedding_api_url": ConfigField("RAG_EMBEDDING_API_URL", "https://api.openai.com/v1/embeddings",
+                                         templates=SUPABASE_ENV),
+    "rag_embedding_api_key": ConfigField("RAG_EMBEDDING_API_KEY", lambda c: c.supabase_openai_api_key),
+    "rag_queue_max_attempts": ConfigField("RAG_QUEUE_MAX_ATTEMPTS", 5, int, templates=SUPABASE_ENV),
+
+    # Реплика базы Supabase для чтения (потоковая репликация, см. replication.py).
+    # Чтение через пулер идет на реплику для пользователя postgres.<SUPABASE_REPLICA_POOLER_TENANT_ID>
+    "supabase_replica_enabled": ConfigField("SUPABASE_REPLICA_ENABLED", "false", bool, templates=SUPABASE_STACK),
+    "supabase_replication_user": ConfigField("SUPABASE_REPLICATION_USER", "replicator",
+                                             templates=SUPABASE_STACK + SUPABASE_REPLICATION,
+                                             pattern=r"[a-z_][a-z0-9_]{0,62}"),
+    "supabase_replication_password": ConfigField("SUPABASE_REPLICATION_PASSWORD", None,
+                                                 templates=SUPABASE_ENV + SUPABASE_REPLICATION),
+    "supabase_replication_slot": ConfigField("SUPABASE_REPLICATION_SLOT", "supabase_replica",
+                                             templates=SUPABASE_STACK + SUPABASE_REPLICATION,
+                                             pattern=r"[a-z0-9_]{1,63}"),
+    "supabase_replica_pooler_tenant_id": ConfigField(None, lambda c: f"{c.supabase_pooler_tenant_id}-ro",
+                                                     var="SUPABASE_REPLICA_POOLER_TENANT_ID",
+                                                     templates=SUPABASE_COMPOSE + SUPABASE_REPLICATION),
+
+    # Экспортер метрик Prometheus (см. exporter.py): команда `exporter` или сервис в compose Supabase
+    "exporter_enabled": ConfigField("EXPORTER_ENABLED", "false", bool, templates=SUPABASE_STACK),
+    "exporter_port": ConfigField("EXPORTER_PORT", 9188, int, templates=SUPABASE_STACK),
+    # Экспортер без аутентификации: по умолчанию порт доступен только с хоста, 0.0.0.0 - явно
+    "exporter_bind_address": ConfigField("EXPORTER_BIND_ADDRESS", "127.0.0.1", templates=SUPABASE_STACK,
+                                         pattern=r"\d{1,3}(\.\d{1,3}){3}"),
+    "exporter_cache_ttl": ConfigField("EXPORTER_CACHE_TTL", 10, int, templates=SUPABASE_ENV),
+    # Код инсталлятора монтируется в контейнер экспортера
+    "installer_root": ConfigField(None, lambda c: os.path.dirname(os.path.abspath(__file__)), var="INSTALLER_ROOT",
+                                  templates=SUPABASE_COMPOSE),
+
+    "common_docker_network_name": ConfigField("COMMON_DOCKER_NETWORK_NAME",
+                                              lambda c: f"{c.tenant}_n8n_supabase_network" if c.tenant
+                                              else "n8n_supabase_network",
+                                              templates=N8N_COMPOSE + SUPABASE_COMPOSE),
+}
+
+# Файлы, из которых читаются ранее сгенерированные настройки (относительно текущей директории).
+# Системное окружение имеет приоритет над ними, первый файл - над следующими.
+# tenant.env создается командой `tenant create` (имя тенанта и выделенные ему порты).
+ENV_FILES = ("tenant.env", ".env", os.path.join("supabase-project", ".env"))
+
+# Кеш распарсенных .env файлов внутри процесса: путь -> (ключ mtime/size, значения)
+_DOTENV_MEMO = {}
+
+# Переменные с секретами (пароли, ключи, токены) не записываются в дисковый кеш .env
+SECRET_ENV_PATTERN = re.compile(r"PASS|SECRET|KEY|TOKEN")
+
+
+def _parse_env_file(path: str) -> dict:
+    from dotenv import dotenv_values
+
+    return {k: v for k, v in dotenv_values(path).items() if v is not None}
+
+
+class _CachedEnvValues(dict):
+    """
+    Значения .env из дискового кеша. Секретов в кеше нет, только их имена:
+    при первом обращении к секрету файл разбирается заново.
+    """
+
+    def __init__(self, path: str, values: dict, secret_keys):
+        super().__init__(values)
+        self._path = path
+        self._secret_keys = set(secret_keys)
+
+    def __contains__(self, key):
+        return super().__contains__(key) or key in self._secret_keys
+
+    def __missing__(self, key):
+        if key not in self._secret_keys:
+            raise KeyError(key)
+        self.update(_parse_env_file(self._path))
+        self._secret_keys.clear()
+        return super().__getitem__(key)
+
+
+def load_env_file(path: str | None = None) -> dict:
+    """
+    Возвращает переменные из .env файла (по умолчанию - .env в текущей директории).
+    Результат парсинга кешируется на диске в .cache/dotenv.json с ключом (mtime, size),
+    поэтому повторные запуски CLI не импортируют python-dotenv, пока файл не изменится
+    и пока не нужен секрет (секреты в кеш не пишутся, см. SECRET_ENV_PATTERN).
+    """
+    path = os.path.abspath(path or os.path.join(os.getcwd(), ".env"))
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    key = [stat.st_mtime_ns, stat.st_size]
+
+    memo = _DOTENV_MEMO.get(path)
+    if memo and memo[0] == key:
+        return memo[1]
+
+    cache_path = os.path.join(os.getcwd(), ".cache", "dotenv.json")
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(path)
+    if entry and entry.get("key") == key and "secret_keys" in entry:
+        values = _CachedEnvValues(path, entry["values"], entry["secret_keys"])
+    else:
+        values = _parse_env_file(path)
+        # Записи прежнего формата хранили секреты - они удаляются при первой перезаписи
+        cache = {p: e for p, e in cache.items() if "secret_keys" in e}
+        cache[path] = {
+            "key": key,
+            "values": {k: v for k, v in values.items() if not SECRET_ENV_PATTERN.search(k)},
+            "secret_keys": sorted(k for k in values if SECRET_ENV_PATTERN.search(k)),
+        }
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # Пишем во временный файл и подменяем атомарно: параллельный запуск CLI
+            # не должен прочитать наполовину записанный кеш
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Кеш - только оптимизация, без него просто парсим .env заново
+
+    _DOTENV_MEMO[path] = (key, values)
+    return values
+
+
+def _cast(field: ConfigField, name: str, raw):
+    if field.type is bool:
+        return raw if isinstance(raw, bool) else str(raw).lower() == "true"
+    try:
+        return field.type(raw)
+    except (TypeError, ValueError):
+        source = f" ({field.env})" if field.env else ""
+        raise ConfigError(f"{name}{source}: ожидается {field.type.__name__}, получено {raw!r}") from None
+
+
 class AppConfig:
-    def __init__(self, skip_inputs: bool = False):  # <-- ИЗМЕНЕНИЕ ЗДЕСЬ
-        self.skip_inputs = skip_inputs  # <-- И ДОБАВЛЕНИЕ ЭТОЙ СТРОКИ
-
-        # N8N
-        self.server = "local"
-        self.n8n_postgres_password = ""
-        self.n8n_pgadmin_password = ""
-        self.n8n_openai_api_key = ""
-        self.n8n_inbucket_web_port = 9000
-        self.n8n_file_permissions = ""
-        self.n8n_postgres_user = "n8n_pg_user"
-        self.n8n_postgres_db = "n8n_pg_db"
-        self.n8n_pgadmin_email = "admin@example.com"
-        self.n8n_generic_timezone = "Europe/Moscow"
-        self.cloudflare_tunnel_token = ""
-        self.n8n_webhook_url = ""
-        self.n8n_postgres_port = ""
-        self.n8n_editor_base_url = "http://localhost:5678"
-
-        # Supabase
-        self.supabase_postgres_password = os.getenv("SUPABASE_POSTGRES_PASSWORD")
-        self.supabase_jwt_secret = os.getenv("SUPABASE_JWT_SECRET")
-        self.supabase_anon_key = os.getenv("SUPABASE_ANON_KEY")
-        self.supabase_service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        self.supabase_dashboard_username = os.getenv("SUPABASE_DASHBOARD_USERNAME", "supabase-admin")
-        self.supabase_dashboard_password = os.getenv("SUPABASE_DASHBOARD_PASSWORD")
-        self.supabase_secret_key_base = os.getenv("SUPABASE_SECRET_KEY_BASE")
-        self.supabase_vault_enc_key = os.getenv("SUPABASE_VAULT_ENC_KEY")
-
-        self.supabase_postgres_host = os.getenv("SUPABASE_POSTGRES_HOST", "db")  # Внутри Docker Compose
-        self.supabase_postgres_port = int(os.getenv("SUPABASE_POSTGRES_PORT", 5435))  # Внутренний порт DB
-        self.supabase_postgres_db = os.getenv("SUPABASE_POSTGRES_DB", "postgres")
-
-        self.supabase_pooler_proxy_port_transaction = int(os.getenv("SUPABASE_POOLER_PROXY_PORT_TRANSACTION", 6543))
-        self.supabase_pooler_default_pool_size = int(os.getenv("SUPABASE_POOLER_DEFAULT_POOL_SIZE", 20))
-        self.supabase_pooler_max_client_conn = int(os.getenv("SUPABASE_POOLER_MAX_CLIENT_CONN", 100))
-        self.supabase_pooler_tenant_id = os.getenv("SUPABASE_POOLER_TENANT_ID", "default")
-
-        self.supabase_kong_http_port = int(os.getenv("SUPABASE_KONG_HTTP_PORT", 8000))
-        self.supabase_kong_https_port = int(os.getenv("SUPABASE_KONG_HTTPS_PORT", 8443))
-
-        self.supabase_pgrst_db_schemas = os.getenv("SUPABASE_PGRST_DB_SCHEMAS",
-                                                   "public,storage,graphql_public,extensions,realtime")
-
-        self.supabase_site_url = os.getenv("SUPABASE_SITE_URL", "http://localhost:8000")
-        self.supabase_additional_redirect_urls = os.getenv("SUPABASE_ADDITIONAL_REDIRECT_URLS", "")
-        self.supabase_jwt_expiry = int(os.getenv("SUPABASE_JWT_EXPIRY", 3600))
-        self.supabase_disable_signup = os.getenv("SUPABASE_DISABLE_SIGNUP", "false").lower() == "true"
-        self.supabase_api_external_url = os.getenv("SUPABASE_API_EXTERNAL_URL", "http://localhost:8000")
-
-        self.supabase_mailer_urlpaths_confirmation = os.getenv("SUPABASE_MAILER_URLPATHS_CONFIRMATION",
-                                                               "/auth/v1/verify")
-        self.supabase_mailer_urlpaths_invite = os.getenv("SUPABASE_MAILER_URLPATHS_INVITE", "/auth/v1/verify")
-        self.supabase_mailer_urlpaths_recovery = os.getenv("SUPABASE_MAILER_URLPATHS_RECOVERY", "/auth/v1/verify")
-        self.supabase_mailer_urlpaths_email_change = os.getenv("SUPABASE_MAILER_URLPATHS_EMAIL_CHANGE",
-                                                               "/auth/v1/verify")
-
-        self.supabase_enable_email_signup = os.getenv("SUPABASE_ENABLE_EMAIL_SIGNUP", "true").lower() == "true"
-        self.supabase_enable_email_autoconfirm = os.getenv("SUPABASE_ENABLE_EMAIL_AUTOCONFIRM",
-                                                           "false").lower() == "true"
-        self.supabase_smtp_admin_email = os.getenv("SUPABASE_SMTP_ADMIN_EMAIL", "admin@example.com")
-        self.supabase_smtp_host = os.getenv("SUPABASE_SMTP_HOST", "supabase-mail")
-        self.supabase_smtp_port = int(os.getenv("SUPABASE_SMTP_PORT", 2500))
-        self.supabase_smtp_user = os.getenv("SUPABASE_SMTP_USER", "fake_mail_user")
-        self.supabase_smtp_pass = os.getenv("SUPABASE_SMTP_PASS", "fake_mail_password")
-        self.supabase_smtp_sender_name = os.getenv("SUPABASE_SMTP_SENDER_NAME", "Supabase")
-        self.supabase_enable_anonymous_users = os.getenv("SUPABASE_ENABLE_ANONYMOUS_USERS", "false").lower() == "true"
-
-        self.supabase_enable_phone_signup = os.getenv("SUPABASE_ENABLE_PHONE_SIGNUP", "true").lower() == "true"
-        self.supabase_enable_phone_autoconfirm = os.getenv("SUPABASE_ENABLE_PHONE_AUTOCONFIRM",
-                                                           "true").lower() == "true"
-
-        self.supabase_studio_default_organization = os.getenv("SUPABASE_STUDIO_DEFAULT_ORGANIZATION",
-                                                              "Default Organization")
-        self.supabase_studio_default_project = os.getenv("SUPABASE_STUDIO_DEFAULT_PROJECT", "Default Project")
-
-        self.supabase_studio_port = int(os.getenv("SUPABASE_STUDIO_PORT", 8000))
-        self.supabase_public_url = os.getenv("SUPABASE_PUBLIC_URL", "http://localhost:8000")
-
-        self.supabase_imgproxy_enable_webp_detection = os.getenv("SUPABASE_IMGPROXY_ENABLE_WEBP_DETECTION",
-                                                                 "true").lower() == "true"
-
-        self.supabase_openai_api_key = os.getenv("SUPABASE_OPENAI_API_KEY", "")
-
-        self.supabase_functions_verify_jwt = os.getenv("SUPABASE_FUNCTIONS_VERIFY_JWT", "false").lower() == "true"
-
-        self.supabase_logfkare_logger_backend_api_key = os.getenv("LOGFLARE_API_KEY")
-        self.supabase_logflare_api_key = os.getenv("LOGFLARE_API_KEY")
-
-        self.supabase_docker_socket_location = os.getenv("SUPABASE_DOCKER_SOCKET_LOCATION", "/var/run/docker.sock")
-
-        self.supabase_google_project_id = os.getenv("SUPABASE_GOOGLE_PROJECT_ID", "")
-        self.supabase_google_project_number = os.getenv("SUPABASE_GOOGLE_PROJECT_NUMBER", "")
-        self.supabase_db_enc_key = os.getenv("SUPABASE_DB_ENC_KEY", "")
-
-        self.common_docker_network_name = os.getenv("COMMON_DOCKER_NETWORK_NAME", "n8n_supabase_network")
+    """
+    Настройки инсталлятора. Поля описаны в CONFIG_SCHEMA и вычисляются лениво:
+    значение читается из окружения (или .env) только при первом обращении
+    и сохраняется в слоте, так что `destroy` читает лишь имя Docker сети.
+    """
+    __slots__ = ("skip_inputs", *CONFIG_SCHEMA)
+
+    def __init__(self, skip_inputs: bool = False):
+        self.skip_inputs = skip_inputs
+
+    def __getattr__(self, name):
+        # Вызывается только для слотов, которые еще не были вычислены
+        field = CONFIG_SCHEMA.get(name)
+        if field is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = self._resolve(name, field)
+        if not callable(field.default):
+            # Вычисляемые поля не кешируются: они зависят от других полей, которые могут измениться
+            setattr(self, name, value)
+        return value
+
+    def _resolve(self, name: str, field: ConfigField):
+        """Значение поля: системное окружение, затем ENV_FILES, затем default."""
+        raw = None
+        if field.env is not None:
+            raw = os.environ.get(field.env)
+            if raw is None:
+                env_values = (load_env_file(path) for path in ENV_FILES)
+                raw = next((values[field.env] for values in env_values if field.env in values), None)
+        if raw is None:
+            raw = field.default(self) if callable(field.default) else field.default
+        return None if raw is None else _cast(field, name, raw)
+
+    def validate(self, require_secrets: bool = True) -> list:
+        """
+        Проверяет все поля схемы и возвращает список ошибок (пустой, если все в порядке).
+        require_secrets=False пропускает проверку обязательных полей (до генерации секретов).
+        """
+        errors = []
+        for name, field in CONFIG_SCHEMA.items():
+            try:
+                value = getattr(self, name)
+            except ConfigError as e:
+                errors.append(str(e))
+                continue
+            if field.pattern and value and not re.fullmatch(field.pattern, str(value)):
+                errors.append(f"{name}: значение {value!r} не соответствует шаблону {field.pattern}")
+            if field.choices and value not in field.choices:
+                errors.append(f"{name}: допустимые значения {', '.join(field.choices)}, получено {value!r}")
+            if require_secrets and field.required and value in (None, ""):
+                errors.append(f"{name} ({field.env or field.template_var}): значение не задано")
+            if field.type is int and name.endswith("_port") and isinstance(value, int) and not 0 < value < 65536:
+                errors.append(f"{name}: порт должен быть в диапазоне 1-65535, получено {value}")
+        return errors
+
+    def template_context(self, template_name: str) -> dict:
+        """Переменные, которые схема открывает для указанного шаблона."""
+        return {
+            field.template_var: getattr(self, name)
+            for name, field in CONFIG_SCHEMA.items()
+            if template_name in field.templates
+        }
 
     def collect_user_inputs(self):
         """
@@ -119,6 +401,8 @@ class AppConfig:
         Если self.skip_inputs True, интерактивный ввод пропускается,
         и используются только значения из .env или сгенерированные.
         """
+        from loguru import logger
+
         if self.skip_inputs:  # <-- ИЗМЕНЕНИЕ ЗДЕСЬ
             logger.info("⏩ Пропускаем интерактивный ввод, используя значения из .env или генерируя их.")
             self.generate_missing_secrets()  # Генерируем только то, что отсутствует
@@ -156,6 +440,8 @@ class AppConfig:
 
     def generate_missing_secrets(self):
         """Генерирует отсутствующие секреты, если они еще не установлены."""
+        from loguru import logger
+
         logger.info("▶️ Проверяем и генерируем недостающие секреты...")
 
         # N8N secrets
@@ -192,6 +478,9 @@ class AppConfig:
         if not self.supabase_postgres_password:
             self.supabase_postgres_password = generate_random_string(32)
             logger.info(f"Сгенерирован SUPABASE_POSTGRES_PASSWORD.")
+        if not self.supabase_replication_password:
+            self.supabase_replication_password = generate_random_string(32)
+            logger.info(f"Сгенерирован SUPABASE_REPLICATION_PASSWORD.")
         if not self.supabase_logflare_api_key:
             self.supabase_logflare_api_key = generate_random_string(32)
             logger.info(f"Сгенерирован SUPABASE_LOGFLARE_API_KEY.")
@@ -0,0 +1,47 @@
+from urllib.parse import quote
+
+from config import AppConfig
+
+
+def pooler_dsn(config: AppConfig, host: str = "localhost", transaction_mode: bool = True,
+               read_only: bool = False) -> str:
+    """
+    DSN для подключения к Supabase Postgres с хоста через Supavisor.
+    Supavisor определяет тенанта пула по имени пользователя вида <user>.<tenant_id>;
+    read_only=True - тенант реплики для чтения (SUPABASE_REPLICA_ENABLED).
+    """
+    port = config.supabase_pooler_proxy_port_transaction if transaction_mode else config.supabase_postgres_port
+    tenant_id = config.supabase_replica_pooler_tenant_id if read_only else config.supabase_pooler_tenant_id
+    user = f"postgres.{tenant_id}"
+    password = quote(config.supabase_postgres_password or "", safe="")
+    return f"postgresql://{user}:{password}@{host}:{port}/{config.supabase_postgres_db}"
+
+
+def connect(dsn: str, **kwargs):
+    """
+    Открывает соединение psycopg. Prepared statements отключены: в транзакционном режиме
+    пулера соседние запросы могут попасть в разные серверные соединения.
+    """
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError("Не установлен psycopg: pip install -r req.txt") from None
+    return psycopg.connect(dsn, prepare_threshold=None, **kwargs)
+
+
+def wait_for_db(dsn: str, timeout: float = 120, interval: float = 2):
+    """Ждет, пока Postgres (или пулер перед ним) начнет принимать соединения."""
+    import time
+
+    import psycopg
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with connect(dsn, connect_timeout=5) as conn:
+                conn.execute("SELECT 1")
+            return
+        except psycopg.OperationalError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(interval)
@@ -0,0 +1,376 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from db import connect
+
+
+# Сгенерированная схема RAG (шаблон supabase_rag_sql.j2) относительно директории стека
+RAG_SQL_PATH = os.path.join("supabase-project", "volumes", "db", "rag.sql")
+
+# Имя коллекции становится частью имени секции public.documents_<имя>
+COLLECTION_PATTERN = r"[a-z0-9][a-z0-9_]{0,47}"
+DEFAULT_COLLECTION = "default"
+
+# Забирает пачку готовых заданий (или с истекшей арендой) и сразу возвращает текст документов.
+# SKIP LOCKED позволяет нескольким воркерам разбирать очередь без ожидания друг друга.
+CLAIM_SQL = """
+with claimed as (
+  select id from rag.embedding_jobs
+  where run_after <= now() and (locked_until is null or locked_until < now())
+  order by id
+  limit %(batch_size)s
+  for update skip locked
+)
+update rag.embedding_jobs j
+set locked_until = now() + %(lease)s * interval '1 second', attempts = j.attempts + 1
+from claimed
+where j.id = claimed.id
+returning j.id, j.document_id, j.collection, j.attempts,
+  (select d.content from public.documents d where d.collection = j.collection and d.id = j.document_id)
+"""
+
+# Записывает эмбеддинги всей пачки и удаляет выполненные задания одним оператором.
+# Эмбеддинг не записывается, если документ изменился после того, как задание было взято:
+# изменение уже поставило новое задание.
+COMPLETE_SQL = """
+with done as (
+  select * from unnest(%(job_ids)s::bigint[], %(document_ids)s::bigint[], %(collections)s::text[],
+                       %(hashes)s::text[], %(embeddings)s::text[])
+    as v(job_id, document_id, collection, content_md5, embedding)
+), updated as (
+  update public.documents d
+  set embedding = done.embedding::{vector}
+  from done
+  where d.collection = done.collection and d.id = done.document_id
+    and done.embedding is not null and md5(d.content) = done.content_md5
+)
+delete from rag.embedding_jobs j using done where j.id = done.job_id
+"""
+
+# Откладывает неудачные задания с экспоненциальной задержкой, исчерпавшие попытки - в dead letter
+FAIL_SQL = """
+with failed as (
+  select * from unnest(%(job_ids)s::bigint[], %(errors)s::text[]) as f(job_id, error)
+), dead as (
+  delete from rag.embedding_jobs j using failed f
+  where j.id = f.job_id and j.attempts >= %(max_attempts)s
+  returning j.id, j.document_id, j.collection, j.attempts, f.error, j.created_at
+), moved as (
+  insert into rag.embedding_jobs_dead (id, document_id, collection, attempts, last_error, created_at)
+  select * from dead
+  on conflict (id) do nothing
+)
+update rag.embedding_jobs j
+set locked_until = null, last_error = f.error,
+    run_after = now() + least(%(backoff)s * power(2, j.attempts - 1), 3600) * interval '1 second'
+from failed f
+where j.id = f.job_id and j.attempts < %(max_attempts)s
+"""
+
+QUEUE_STATS_SQL = """
+select
+  count(*) filter (where locked_until is null or locked_until < now()),
+  count(*) filter (where locked_until >= now()),
+  (select count(*) from rag.embedding_jobs_dead),
+  coalesce(extract(epoch from now() - min(created_at)), 0)
+from rag.embedding_jobs
+"""
+
+RETRY_DEAD_SQL = """
+with revived as (
+  delete from rag.embedding_jobs_dead returning document_id, collection
+)
+insert into rag.embedding_jobs (document_id, collection) select distinct document_id, collection from revived
+"""
+
+
+def vector_schema(conn) -> str:
+    """Схема, в которую установлен pgvector: extensions в Supabase, обычно public в остальных Postgres."""
+    return conn.execute(
+        "select n.nspname from pg_extension e join pg_namespace n on n.oid = e.extnamespace"
+        " where e.extname = 'vector'"
+    ).fetchone()[0]
+
+
+class Embedder:
+    """
+    Клиент API эмбеддингов, совместимого с OpenAI /v1/embeddings (OpenAI, Ollama, vLLM, TEI).
+    Пачка текстов делится на запросы по request_size, которые выполняются не более чем
+    в concurrency потоках одновременно.
+    """
+
+    def __init__(self, api_url: str, model: str, dim: int, api_key: str = "", request_size: int = 64,
+                 concurrency: int = 4, timeout: float = 60):
+        self.api_url = api_url
+        self.model = model
+        self.dim = dim
+        self.api_key = api_key
+        self.request_size = request_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+
+            session = self._local.session = requests.Session()
+            if self.api_key:
+                session.headers["Authorization"] = f"Bearer {self.api_key}"
+        return session
+
+    def _embed_request(self, texts: list) -> list:
+        response = self._session().post(self.api_url, json={"model": self.model, "input": texts},
+                                        timeout=self.timeout)
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        if len(data) != len(texts):
+            raise ValueError(f"API вернул {len(data)} эмбеддингов на {len(texts)} текстов")
+        if any(len(item["embedding"]) != self.dim for item in data):
+            raise ValueError(f"размерность эмбеддингов модели {self.model} не совпадает с RAG_EMBEDDING_DIM={self.dim}")
+        return [item["embedding"] for item in data]
+
+    def embed(self, texts: list, request_size: int | None = None) -> list:
+        """
+        Возвращает список той же длины, что texts: эмбеддинг или исключение для текстов,
+        запрос по которым завершился ошибкой (остальные запросы пачки не затрагиваются).
+        """
+        request_size = request_size or self.request_size
+        chunks = [texts[i:i + request_size] for i in range(0, len(texts), request_size)]
+        futures = [self._executor.submit(self._embed_request, chunk) for chunk in chunks]
+        results = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                results.extend([e] * len(chunk))
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def _vector_literal(embedding: list) -> str:
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def process_batch(conn, embedder: Embedder, batch_size: int, max_attempts: int,
+                  lease: int = 300, backoff: int = 10, schema: str | None = None) -> tuple:
+    """
+    Обрабатывает одну пачку заданий: claim -> эмбеддинг -> запись векторов одним оператором.
+    schema - схема pgvector (см. vector_schema), чтобы не определять ее на каждой пачке.
+    Возвращает (выполнено, с ошибкой); (0, 0) - очередь пуста.
+    """
+    import hashlib
+
+    from psycopg import sql
+
+    with conn.transaction():
+        jobs = conn.execute(CLAIM_SQL, {"batch_size": batch_size, "lease": lease}).fetchall()
+    if not jobs:
+        return 0, 0
+
+    # Документ удален или пуст - эмбеддинг не нужен, задание просто закрывается.
+    # Повторные попытки отправляются по одному тексту, чтобы один "плохой" документ
+    # не валил вместе с собой остальные тексты своего запроса.
+    fresh = [(job_id, (document_id, collection), content)
+             for job_id, document_id, collection, attempts, content in jobs if content and attempts == 1]
+    retries = [(job_id, (document_id, collection), content)
+               for job_id, document_id, collection, attempts, content in jobs if content and attempts > 1]
+    pending = fresh + retries
+    embeddings = []
+    if fresh:
+        embeddings += embedder.embed([content for _, _, content in fresh])
+    if retries:
+        embeddings += embedder.embed([content for _, _, content in retries], request_size=1)
+
+    done = {"job_ids": [], "document_ids": [], "collections": [], "hashes": [], "embeddings": []}
+    failed = {"job_ids": [], "errors": []}
+    for job_id, document_id, collection, _, content in jobs:
+        if not content:
+            done["job_ids"].append(job_id)
+            done["document_ids"].append(document_id)
+            done["collections"].append(collection)
+            done["hashes"].append(None)
+            done["embeddings"].append(None)
+    for (job_id, (document_id, collection), content), embedding in zip(pending, embeddings):
+        if isinstance(embedding, Exception):
+            failed["job_ids"].append(job_id)
+            failed["errors"].append(f"{type(embedding).__name__}: {embedding}"[:1000])
+        else:
+            done["job_ids"].append(job_id)
+            done["document_ids"].append(document_id)
+            done["collections"].append(collection)
+            done["hashes"].append(hashlib.md5(content.encode("utf-8")).hexdigest())
+            done["embeddings"].append(_vector_literal(embedding))
+
+    with conn.transaction():
+        if done["job_ids"]:
+            complete = sql.SQL(COMPLETE_SQL).format(vector=sql.Identifier(schema or vector_schema(conn), "vector"))
+            conn.execute(complete, done)
+        if failed["job_ids"]:
+            conn.execute(FAIL_SQL, {**failed, "max_attempts": max_attempts, "backoff": backoff})
+    return len(done["job_ids"]), len(failed["job_ids"])
+
+
+def run_worker(dsn: str, embedder: Embedder, batch_size: int = 100, max_attempts: int = 5,
+               poll_interval: float = 2, once: bool = False):
+    """
+    Разбирает очередь эмбеддингов, пока не будет прерван (once=True - до опустошения очереди).
+    Несколько воркеров можно запускать параллельно: задания распределяются через SKIP LOCKED.
+    """
+    processed = failed = 0
+    started = time.perf_counter()
+    with connect(dsn, autocommit=True) as conn:
+        schema = vector_schema(conn)
+        try:
+            while True:
+                ok, errors = process_batch(conn, embedder, batch_size, max_attempts, schema=schema)
+                processed += ok
+                failed += errors
+                if ok or errors:
+                    rate = processed / (time.perf_counter() - started)
+                    logger.info(f"📦 Пачка: {ok} готово, {errors} с ошибкой (всего {processed}, {rate:.1f} док/с)")
+                elif once:
+                    break
+                else:
+                    time.sleep(poll_interval)
+        finally:
+            embedder.close()
+    return processed, failed
+
+
+def queue_stats(conn) -> dict:
+    """Глубина очереди: ожидающие, взятые в работу, dead letter и возраст старейшего задания (с)."""
+    ready, in_progress, dead, oldest_age = conn.execute(QUEUE_STATS_SQL).fetchone()
+    return {"ready": ready, "in_progress": in_progress, "dead": dead, "oldest_age": float(oldest_age)}
+
+
+def retry_dead(conn) -> int:
+    """Возвращает задания из dead letter в очередь. Возвращает количество документов."""
+    return conn.execute(RETRY_DEAD_SQL).rowcount
+
+
+def validate_collection_name(name: str):
+    if not re.fullmatch(COLLECTION_PATTERN, name) or name == DEFAULT_COLLECTION:
+        raise ValueError(f"Недопустимое имя коллекции '{name}': ожидается {COLLECTION_PATTERN}, "
+                         f"кроме '{DEFAULT_COLLECTION}'")
+
+
+def _partition_state(conn, name: str):
+    """None - секции нет, True - подключена к public.documents, False - отключена (обычная таблица)."""
+    row = conn.execute(
+        "select c.relispartition from pg_class c where c.oid = to_regclass(%s)", (f"public.documents_{name}",)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def list_collections(conn) -> list:
+    """Секции документов (включая отключенные): [(коллекция, подключена, строк ~, байт)]."""
+    rows = conn.execute(
+        "select substr(c.relname, length('documents_') + 1), c.relispartition,"
+        "       greatest(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid)"
+        " from pg_class c"
+        " where c.relnamespace = 'public'::regnamespace and c.relkind = 'r'"
+        "   and c.relname like 'documents\\_%'"
+        "   and exists (select 1 from pg_attribute a where a.attrelid = c.oid and a.attname = 'collection')"
+        " order by 1"
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def attach_collection(conn, name: str) -> int:
+    """
+    Подключает секцию коллекции name. Если таблицы documents_<name> еще нет, она создается,
+    в нее переносятся документы коллекции из documents_default, и только затем строится
+    HNSW индекс (построение по готовым данным быстрее вставки в индекс). Ранее отключенная
+    секция подключается обратно вместе с документами коллекции, попавшими за это время
+    в documents_default. Документы без эмбеддингов ставятся в очередь.
+    Возвращает количество документов в секции.
+    """
+    from psycopg import sql
+
+    validate_collection_name(name)
+    table = sql.Identifier(f"documents_{name}")
+    check = sql.Identifier(f"documents_{name}_collection_check")
+
+    with conn.transaction():
+        state = _partition_state(conn, name)
+        if state:
+            raise ValueError(f"Коллекция '{name}' уже подключена.")
+        if state is None:
+            conn.execute(sql.SQL("create table public.{} (like public.documents including defaults)").format(table))
+            conn.execute(sql.SQL(
+                "with moved as (delete from public.documents_default where collection = %s returning *)"
+                " insert into public.{} select * from moved").format(table), (name,))
+            conn.execute(sql.SQL("alter table public.{} add primary key (collection, id)").format(table))
+            conn.execute(sql.SQL("create index on public.{} using hnsw (embedding {})")
+                         .format(table, sql.Identifier(vector_schema(conn), "vector_cosine_ops")))
+        else:
+            # ATTACH PARTITION отклоняет таблицу с любым триггером на transition tables, в том числе
+            # уровня оператора (хотя текст ошибки говорит о ROW триггерах), поэтому триггеры
+            # снимаются и пересоздаются после подключения
+            for trigger in ("documents_enqueue_insert", "documents_enqueue_update"):
+                conn.execute(sql.SQL("drop trigger if exists {} on public.{}").format(sql.Identifier(trigger), table))
+            # Пока секция была отключена, документы коллекции попадали в documents_default;
+            # с ними ATTACH не пройдет проверку секции по умолчанию
+            conn.execute(sql.SQL(
+                "with moved as (delete from public.documents_default where collection = %s returning *)"
+                " insert into public.{} select * from moved").format(table), (name,))
+            # Задания отключенной секции удалены при detach, у перенесенных документов они уже есть
+            conn.execute(sql.SQL(
+                "insert into rag.embedding_jobs (document_id, collection)"
+                " select d.id, d.collection from public.{} d where d.embedding is null"
+                " and not exists (select 1 from rag.embedding_jobs j"
+                " where j.document_id = d.id and j.collection = d.collection)").format(table))
+        # CHECK-ограничение избавляет ATTACH PARTITION от проверки всех строк секции
+        conn.execute(sql.SQL("alter table public.{} add constraint {} check (collection = {})")
+                     .format(table, check, sql.Literal(name)))
+        conn.execute(sql.SQL("alter table public.documents attach partition public.{} for values in ({})")
+                     .format(table, sql.Literal(name)))
+        conn.execute(sql.SQL("alter table public.{} drop constraint {}").format(table, check))
+        conn.execute("select rag.create_enqueue_triggers(%s::regclass)", (f"public.documents_{name}",))
+        return conn.execute(sql.SQL("select count(*) from public.{}").format(table)).fetchone()[0]
+
+
+def detach_collection(conn, name: str):
+    """
+    Отключает секцию коллекции: документы остаются в таблице documents_<name>,
+    но перестают участвовать в поиске. Подключить обратно - attach_collection.
+    """
+    from psycopg import sql
+
+    validate_collection_name(name)
+    with conn.transaction():
+        if not _partition_state(conn, name):
+            raise ValueError(f"Коллекция '{name}' не подключена.")
+        conn.execute(sql.SQL("alter table public.documents detach partition public.{}")
+                     .format(sql.Identifier(f"documents_{name}")))
+        conn.execute("delete from rag.embedding_jobs where collection = %s", (name,))
+
+
+def drop_collection(conn, name: str):
+    """Удаляет коллекцию целиком: DROP секции мгновенный, в отличие от DELETE по всей таблице."""
+    from psycopg import sql
+
+    validate_collection_name(name)
+    with conn.transaction():
+        if _partition_state(conn, name) is None:
+            raise ValueError(f"Коллекция '{name}' не найдена.")
+        conn.execute(sql.SQL("drop table public.{}").format(sql.Identifier(f"documents_{name}")))
+        conn.execute("delete from rag.embedding_jobs where collection = %s", (name,))
+        conn.execute("delete from rag.embedding_jobs_dead where collection = %s", (name,))
+
+
+def apply_schema(dsn: str, sql_path: str = RAG_SQL_PATH):
+    """Применяет сгенерированную схему RAG (скрипт идемпотентен)."""
+    with open(sql_path, encoding="utf-8") as f:
+        sql = f.read()
+    with connect(dsn, autocommit=True) as conn:
+        conn.execute(sql)
@@ -0,0 +1,138 @@
+import os
+import functools
+from typing import NamedTuple
+
+from config import AppConfig
+
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(PROJECT_ROOT, "templates")
+BYTECODE_CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "jinja2")
+
+
+class RenderTarget(NamedTuple):
+    template: str
+    output: str  # Путь к сгенерированному файлу относительно корня проекта
+
+
+SUPABASE_TARGETS = (
+    RenderTarget("supabase_env.j2", os.path.join("supabase-project", ".env")),
+    RenderTarget("supabase_docker_compose.j2", os.path.join("supabase-project", "docker-compose.yml")),
+    RenderTarget("supabase_kong.j2", os.path.join("supabase-project", "volumes", "api", "kong.yml")),
+    RenderTarget("supabase_vector.j2", os.path.join("supabase-project", "volumes", "logs", "vector.yml")),
+    RenderTarget("supabase_jwt_sql.j2", os.path.join("supabase-project", "volumes", "db", "jwt.sql")),
+    RenderTarget("supabase_rag_sql.j2", os.path.join("supabase-project", "volumes", "db", "rag.sql")),
+    RenderTarget("supabase_replication_sql.j2", os.path.join("supabase-project", "volumes", "db", "replication.sql")),
+    RenderTarget("supabase_pg_hba.j2", os.path.join("supabase-project", "volumes", "db", "pg_hba.conf")),
+    RenderTarget("supabase_pooler_replica.j2",
+                 os.path.join("supabase-project", "volumes", "pooler", "pooler_replica.exs")),
+)
+
+N8N_TARGETS = {
+    "local": (
+        RenderTarget("n8n_docker_compose_local.j2", "docker-compose.yml"),
+        RenderTarget("n8n_env_local.j2", ".env"),
+        RenderTarget("nginx.j2", os.path.join("nginx", "nginx.conf")),
+        RenderTarget("nginx_conf_d_local.j2", os.path.join("nginx", "conf.d", "n8n.conf")),
+    ),
+    "vps": (
+        RenderTarget("n8n_docker_compose_vps.j2", "docker-compose_vps.yml"),
+        RenderTarget("n8n_env_vps.j2", ".env_vps"),
+        RenderTarget("nginx_vps.j2", os.path.join("nginx", "nginx.conf")),
+        RenderTarget("nginx_conf_d_vps.j2", os.path.join("nginx", "conf.d", "n8n.conf")),
+    ),
+}
+
+
+def psql_quote(value) -> str:
+    """
+    Значение в одинарных кавычках для аргумента метакоманды psql (\\set): внутри них psql
+    разбирает обратную косую черту как escape, а кавычка удваивается.
+    """
+    value = "" if value is None else str(value)
+    return "'" + value.replace("\\", "\\\\").replace("'", "''").replace("\n", "\\n") + "'"
+
+
+@functools.lru_cache(maxsize=None)
+def get_environment():
+    """
+    Общее Jinja2 окружение для всех шаблонов.
+    StrictUndefined превращает опечатку в имени переменной в ошибку, а скомпилированные
+    шаблоны сохраняются в .cache/jinja2 и не компилируются заново при следующем запуске.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined
+
+    os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        undefined=StrictUndefined,
+        bytecode_cache=FileSystemBytecodeCache(BYTECODE_CACHE_DIR),
+    )
+    environment.filters["psql_quote"] = psql_quote
+    return environment
+
+
+def get_targets(config: AppConfig) -> tuple:
+    """Все файлы, которые генерируются для выбранного типа сервера."""
+    return N8N_TARGETS[config.server.lower()] + SUPABASE_TARGETS
+
+
+def render_target(config: AppConfig, target: RenderTarget) -> str:
+    template = get_environment().get_template(target.template)
+    return template.render(config.template_context(target.template))
+
+
+def render_all(config: AppConfig, output_root: str | None = None, targets=None) -> list:
+    """
+    Рендерит все шаблоны за один проход (параллельно, в потоках) и записывает их в output_root.
+    Возвращает список записанных RenderTarget.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    output_root = output_root or os.getcwd()
+    targets = tuple(targets or get_targets(config))
+
+    errors = config.validate()
+    if errors:
+        raise ValueError("Некорректная конфигурация:\n" + "\n".join(f"  - {e}" for e in errors))
+
+    def write(target: RenderTarget) -> RenderTarget:
+        rendered = render_target(config, target)
+        path = os.path.join(output_root, target.output)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Пишем во временный файл и подменяем атомарно: целевой файл может быть
+        # жесткой ссылкой на файл из репозитория Supabase (см. volumes.seed_tree)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(rendered)
+        os.replace(tmp_path, path)
+        return target
+
+    with ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1) or 1) as executor:
+        return list(executor.map(write, targets))
+
+
+def diff_rendered(config: AppConfig, project_root: str | None = None) -> dict:
+    """
+    Рендерит шаблоны во временную директорию и сравнивает с текущими файлами.
+    Возвращает {путь: unified diff} для файлов, которые отличаются или отсутствуют.
+    """
+    import difflib
+    import tempfile
+
+    project_root = project_root or os.getcwd()
+    diffs = {}
+    with tempfile.TemporaryDirectory(prefix="render-") as tmp_dir:
+        for target in render_all(config, output_root=tmp_dir):
+            with open(os.path.join(tmp_dir, target.output)) as f:
+                expected = f.read().splitlines(keepends=True)
+            current_path = os.path.join(project_root, target.output)
+            try:
+                with open(current_path) as f:
+                    current = f.read().splitlines(keepends=True)
+            except FileNotFoundError:
+                current = []
+            if current != expected:
+                diffs[target.output] = "".join(difflib.unified_diff(
+                    current, expected, fromfile=f"a/{target.output}", tofile=f"b/{target.output}"))
+    return diffs
@@ -0,0 +1,105 @@
+import re
+import time
+
+from loguru import logger
+
+from config import AppConfig, CONFIG_SCHEMA
+from utils import run_command
+
+
+# replication.sql монтируется в контейнер базы как скрипт инициализации (см. supabase_docker_compose.j2)
+REPLICATION_SQL_PATH = "/docker-entrypoint-initdb.d/init-scripts/99-replication.sql"
+
+# Отставание реплики по слоту: сколько WAL еще не применено и replay_lag (NULL, пока нет активности)
+LAG_SQL = """
+select s.slot_name, coalesce(r.state, 'disconnected'),
+       pg_wal_lsn_diff(pg_current_wal_lsn(), coalesce(r.replay_lsn, s.restart_lsn))::bigint,
+       extract(epoch from r.replay_lag)
+from pg_replication_slots s
+left join pg_stat_replication r on r.pid = s.active_pid
+where s.slot_name = '{slot}'
+"""
+
+DROP_SLOT_SQL = """
+select pg_drop_replication_slot(slot_name) from pg_replication_slots
+where slot_name = '{slot}' and not active
+"""
+
+
+def db_container(config: AppConfig) -> str:
+    return f"{config.container_prefix}supabase-db"
+
+
+def _replication_slot(config: AppConfig) -> str:
+    """
+    Имя слота репликации, проверенное по шаблону схемы: оно подставляется в SQL,
+    а status читает его из .env без полной проверки настроек (config.validate).
+    """
+    slot = config.supabase_replication_slot
+    pattern = CONFIG_SCHEMA["supabase_replication_slot"].pattern
+    if not re.fullmatch(pattern, slot):
+        raise ValueError(f"Недопустимое имя слота репликации '{slot}': ожидается {pattern}")
+    return slot
+
+
+def _psql(config: AppConfig, *args, check: bool = True):
+    """
+    psql внутри контейнера основной базы от имени supabase_admin: создание пользователя
+    репликации требует суперпользователя, а сама база на хост не публикуется.
+    Пароль берется из PGPASSWORD контейнера, поэтому не попадает в командную строку.
+    """
+    return run_command(
+        ["docker", "exec", db_container(config), "psql", "-X", "-h", "127.0.0.1", "-U", "supabase_admin",
+         "-d", config.supabase_postgres_db, "-v", "ON_ERROR_STOP=1", *args],
+        check=check,
+    )
+
+
+def _wait_for_primary(config: AppConfig, timeout: float = 180, interval: float = 2) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = run_command(["docker", "exec", db_container(config), "pg_isready", "-h", "127.0.0.1"], check=False)
+        if result.returncode == 0:
+            return True
+        time.sleep(interval)
+    return False
+
+
+def setup_replication(config: AppConfig):
+    """
+    Готовит основную базу к потоковой репликации: пользователь репликации и физический слот
+    (replication.sql идемпотентен). Реплика при первом запуске ждет их и копирует базу сама.
+    Если реплика выключена, неактивный слот удаляется - иначе он бесконечно удерживал бы WAL.
+    Готовность базы при этом не ожидается: установка вызывает функцию, когда база уже отвечает.
+    """
+    slot = _replication_slot(config)
+    if not config.supabase_replica_enabled:
+        _psql(config, "-c", DROP_SLOT_SQL.format(slot=slot), check=False)
+        return
+
+    if not config.supabase_replication_password:
+        logger.error("❌ SUPABASE_REPLICATION_PASSWORD не задан: запустите установку (install) для генерации секретов.")
+        return
+
+    logger.info(f"▶️ Настраиваем репликацию (пользователь {config.supabase_replication_user}, слот {slot})...")
+    if not _wait_for_primary(config):
+        logger.error("❌ Основная база не отвечает, репликация не настроена. Повторить: python main.py install")
+        return
+    try:
+        _psql(config, "-f", REPLICATION_SQL_PATH)
+    except Exception as e:
+        logger.error(f"❌ Не удалось настроить репликацию: {e}")
+        return
+    logger.success(f"✅ Репликация настроена. Чтение с реплики через пулер: "
+                   f"postgres.{config.supabase_replica_pooler_tenant_id}")
+
+
+def replication_lag(config: AppConfig) -> list:
+    """[(слот, состояние, отставание в байтах или None, replay_lag в секундах или None)] с основной базы."""
+    result = _psql(config, "-At", "-F", "|", "-c", LAG_SQL.format(slot=_replication_slot(config)))
+    rows = []
+    for line in result.stdout.splitlines():
+        slot, state, lag_bytes, lag_seconds = line.split("|")
+        rows.append((slot, state, int(lag_bytes) if lag_bytes else None,
+                     float(lag_seconds) if lag_seconds else None))
+    return rows
@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import shutil
+import socket
+import contextlib
+from datetime import datetime, timezone
+
+from config import AppConfig, CONFIG_SCHEMA
+
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+TENANTS_DIR = os.path.join(PROJECT_ROOT, "tenants")
+REGISTRY_PATH = os.path.join(TENANTS_DIR, "registry.json")
+TENANT_ENV_FILE = "tenant.env"
+
+# Порты, публикуемые на хосте, и базовые значения для поиска свободных.
+# Базовые значения заняты основным (не-тенантным) стеком и тенантам не выдаются.
+PORT_BASES = {
+    "n8n_host_port": 5678,
+    "n8n_postgres_port": 5432,
+    "n8n_pgadmin_port": 5051,
+    "n8n_inbucket_web_port": 9000,
+    "n8n_inbucket_smtp_port": 25000,
+    "n8n_inbucket_pop3_port": 1100,
+    "supabase_kong_http_port": 8000,
+    "supabase_kong_https_port": 8443,
+    "supabase_postgres_port": 5435,
+    "supabase_pooler_proxy_port_transaction": 6543,
+    "supabase_analytics_port": 4000,
+    "exporter_port": 9188,
+}
+
+
+def tenant_dir(name: str) -> str:
+    return os.path.join(TENANTS_DIR, name)
+
+
+def validate_tenant_name(name: str):
+    pattern = CONFIG_SCHEMA["tenant"].pattern
+    if not re.fullmatch(pattern, name):
+        raise ValueError(f"Недопустимое имя тенанта '{name}': ожидается {pattern}")
+    # Имена проектов compose: supabase у основного стека, <тенант>-supabase у тенантов
+    if name == "supabase" or name.endswith("-supabase"):
+        raise ValueError(f"Недопустимое имя тенанта '{name}': совпадет с именем проекта Supabase другого стека")
+
+
+@contextlib.contextmanager
+def _registry_lock():
+    """Блокировка реестра, чтобы параллельные `tenant create` не выдали одни и те же порты."""
+    os.makedirs(TENANTS_DIR, exist_ok=True)
+    with open(os.path.join(TENANTS_DIR, ".lock"), "w") as lock_file:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            yield
+            return
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_registry() -> dict:
+    """Реестр тенантов: {имя: {"ports": {поле: порт}, "created_at": ...}}."""
+    try:
+        with open(REGISTRY_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_registry(registry: dict):
+    tmp_path = f"{REGISTRY_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, REGISTRY_PATH)
+
+
+def _port_is_free(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(("0.0.0.0", port))
+        except OSError:
+            return False
+    return True
+
+
+def _root_stack_ports() -> set:
+    """
+    Порты основного стека из его .env файлов: они могут отличаться от PORT_BASES,
+    а пока стек остановлен, проверка _port_is_free их не увидит.
+    ENV_FILES читаются относительно текущей директории, поэтому читаем из корня проекта.
+    """
+    cwd = os.getcwd()
+    os.chdir(PROJECT_ROOT)
+    try:
+        config = AppConfig(skip_inputs=True)
+        values = (str(getattr(config, field) or "") for field in PORT_BASES)
+        # N8N_POSTGRES_PORT строковый и может быть не задан
+        return {int(value) for value in values if value.isdigit()}
+    finally:
+        os.chdir(cwd)
+
+
+def allocate_ports(registry: dict) -> dict:
+    """
+    Подбирает каждому порту из PORT_BASES ближайший свободный, не занятый
+    основным стеком и другими тенантами.
+    """
+    used = set(PORT_BASES.values()) | _root_stack_ports()
+    for tenant in registry.values():
+        used.update(tenant["ports"].values())
+
+    ports = {}
+    for field, base in PORT_BASES.items():
+        port = base + 1
+        while port in used or not _port_is_free(port):
+            port += 1
+        used.add(port)
+        ports[field] = port
+    return ports
+
+
+def create_tenant(name: str) -> dict:
+    """
+    Регистрирует тенанта: выделяет порты, создает tenants/<имя>/ и tenant.env.
+    Возвращает запись реестра.
+    """
+    validate_tenant_name(name)
+    with _registry_lock():
+        registry = load_registry()
+        if name in registry:
+            raise ValueError(f"Тенант '{name}' уже существует.")
+
+        entry = {
+            "ports": allocate_ports(registry),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        os.makedirs(tenant_dir(name), exist_ok=True)
+        with open(os.path.join(tenant_dir(name), TENANT_ENV_FILE), "w", encoding="utf-8") as f:
+            f.write(f'TENANT="{name}"\n')
+            for field, port in entry["ports"].items():
+                f.write(f'{CONFIG_SCHEMA[field].env}="{port}"\n')
+
+        registry[name] = entry
+        _save_registry(registry)
+    return entry
+
+
+def remove_tenant(name: str):
+    """Удаляет тенанта из реестра и его директорию (контейнеры должны быть уже остановлены)."""
+    with _registry_lock():
+        registry = load_registry()
+        registry.pop(name, None)
+        _save_registry(registry)
+    shutil.rmtree(tenant_dir(name), ignore_errors=True)
+
+
+def enter_tenant(name: str):
+    """Делает директорию тенанта текущей: все команды CLI работают относительно os.getcwd()."""
+    validate_tenant_name(name)
+    if not os.path.isfile(os.path.join(tenant_dir(name), TENANT_ENV_FILE)):
+        raise ValueError(f"Тенант '{name}' не найден. Создайте его: python main.py tenant create {name}")
+    os.chdir(tenant_dir(name))
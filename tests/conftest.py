@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(tmp_path, monkeypatch):
+    """Каждый тест - в пустой директории, без переменных схемы в окружении и без кеша .env в памяти."""
+    for field in config.CONFIG_SCHEMA.values():
+        if field.env:
+            monkeypatch.delenv(field.env, raising=False)
+    monkeypatch.chdir(tmp_path)
+    config._DOTENV_MEMO.clear()
+    yield tmp_path
+    config._DOTENV_MEMO.clear()
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+import config
+from config import AppConfig, ConfigError, load_env_file
+
+
+def write_env(path, **values):
+    with open(path, "w", encoding="utf-8") as f:
+        for key, value in values.items():
+            f.write(f'{key}="{value}"\n')
+
+
+def test_defaults_and_casts(monkeypatch):
+    monkeypatch.setenv("EXPORTER_PORT", "9300")
+    monkeypatch.setenv("SUPABASE_REPLICA_ENABLED", "True")
+    cfg = AppConfig(skip_inputs=True)
+    assert cfg.exporter_port == 9300
+    assert cfg.supabase_replica_enabled is True
+    assert cfg.supabase_kong_http_port == 8000
+
+
+def test_environment_overrides_env_file(monkeypatch):
+    write_env(".env", N8N_HOST_PORT="5700", N8N_PGADMIN_PORT="5060")
+    monkeypatch.setenv("N8N_HOST_PORT", "5800")
+    cfg = AppConfig(skip_inputs=True)
+    assert cfg.n8n_host_port == 5800
+    assert cfg.n8n_pgadmin_port == 5060
+
+
+def test_invalid_int_raises_config_error(monkeypatch):
+    monkeypatch.setenv("EXPORTER_PORT", "abc")
+    with pytest.raises(ConfigError, match="EXPORTER_PORT"):
+        AppConfig(skip_inputs=True).exporter_port
+    assert any("EXPORTER_PORT" in error for error in AppConfig(skip_inputs=True).validate(require_secrets=False))
+
+
+@pytest.mark.parametrize("env, value, fragment", [
+    ("EXPORTER_PORT", "70000", "1-65535"),
+    ("TENANT", "Bad Name", "шаблону"),
+    ("SUPABASE_REPLICATION_SLOT", "x'; drop", "шаблону"),
+    ("EXPORTER_BIND_ADDRESS", "localhost", "шаблону"),
+])
+def test_validate_rejects(monkeypatch, env, value, fragment):
+    monkeypatch.setenv(env, value)
+    errors = AppConfig(skip_inputs=True).validate(require_secrets=False)
+    assert any(fragment in error for error in errors), errors
+
+
+def test_validate_choices():
+    cfg = AppConfig(skip_inputs=True)
+    cfg.server = "cloud"
+    assert any("допустимые значения" in error for error in cfg.validate(require_secrets=False))
+
+
+def test_validate_required_only_with_secrets():
+    cfg = AppConfig(skip_inputs=True)
+    assert any("N8N_POSTGRES_PORT" in error for error in cfg.validate())
+    assert not any("N8N_POSTGRES_PORT" in error for error in cfg.validate(require_secrets=False))
+
+
+def test_env_cache_keeps_secrets_out(isolated_env):
+    write_env(".env", N8N_HOST_PORT="5700", N8N_POSTGRES_PASSWORD="s3cret")
+    assert load_env_file()["N8N_POSTGRES_PASSWORD"] == "s3cret"
+
+    with open(os.path.join(".cache", "dotenv.json"), encoding="utf-8") as f:
+        cache = json.load(f)
+    entry = cache[str(isolated_env / ".env")]
+    assert entry["values"] == {"N8N_HOST_PORT": "5700"}
+    assert entry["secret_keys"] == ["N8N_POSTGRES_PASSWORD"]
+    assert "s3cret" not in json.dumps(cache)
+
+    # Повторный запуск: значения из дискового кеша, секрет дочитывается из файла
+    config._DOTENV_MEMO.clear()
+    values = load_env_file()
+    assert isinstance(values, config._CachedEnvValues)
+    assert "N8N_POSTGRES_PASSWORD" in values
+    assert values["N8N_POSTGRES_PASSWORD"] == "s3cret"
+
+
+def test_env_cache_invalidated_on_change():
+    write_env(".env", N8N_HOST_PORT="5700")
+    assert load_env_file()["N8N_HOST_PORT"] == "5700"
+    write_env(".env", N8N_HOST_PORT="57010")  # Другой размер - другой ключ кеша
+    config._DOTENV_MEMO.clear()
+    assert load_env_file()["N8N_HOST_PORT"] == "57010"
+
+
+def test_missing_env_file():
+    assert load_env_file() == {}
@@ -0,0 +1,20 @@
+import pytest
+
+from render import get_environment, psql_quote
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, "''"),
+    ("", "''"),
+    ("plain", "'plain'"),
+    ("it's", "'it''s'"),
+    ("back\\slash", "'back\\\\slash'"),
+    ("a\nb", "'a\\nb'"),
+    (":'var' \\gexec", "':''var'' \\\\gexec'"),
+])
+def test_psql_quote(value, expected):
+    assert psql_quote(value) == expected
+
+
+def test_psql_quote_registered_as_filter():
+    assert get_environment().filters["psql_quote"] is psql_quote
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import tenants
+
+
+@pytest.fixture
+def project_root(tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    monkeypatch.setattr(tenants, "PROJECT_ROOT", str(root))
+    return root
+
+
+def test_allocate_ports_skips_bases_tenants_and_busy_ports(project_root, monkeypatch):
+    monkeypatch.setattr(tenants, "_port_is_free", lambda port: port != 5433)
+    registry = {"acme": {"ports": {"n8n_host_port": 5679, "supabase_kong_http_port": 8001}}}
+
+    ports = tenants.allocate_ports(registry)
+
+    assert set(ports) == set(tenants.PORT_BASES)
+    assert ports["n8n_host_port"] == 5680
+    assert ports["supabase_kong_http_port"] == 8002
+    assert ports["n8n_postgres_port"] == 5434  # 5433 занят на хосте
+    assert len(set(ports.values())) == len(ports)
+    assert not set(ports.values()) & set(tenants.PORT_BASES.values())
+
+
+def test_allocate_ports_skips_root_stack_ports(project_root, monkeypatch):
+    (project_root / ".env").write_text('N8N_HOST_PORT="5679"\nN8N_POSTGRES_PORT="5433"\n', encoding="utf-8")
+    monkeypatch.setattr(tenants, "_port_is_free", lambda port: True)
+
+    ports = tenants.allocate_ports({})
+
+    assert ports["n8n_host_port"] == 5680
+    assert ports["n8n_postgres_port"] == 5434
+
+
+def test_allocate_ports_keeps_cwd(project_root, monkeypatch, tmp_path):
+    monkeypatch.setattr(tenants, "_port_is_free", lambda port: True)
+    tenants.allocate_ports({})
+    assert os.getcwd() == str(tmp_path)
+
+
+@pytest.mark.parametrize("name", ["Acme", "-acme", "a" * 40, "supabase", "acme-supabase"])
+def test_validate_tenant_name_rejects(name):
+    with pytest.raises(ValueError):
+        tenants.validate_tenant_name(name)
+
+
+@pytest.mark.parametrize("name", ["acme", "acme_2", "supabase-x"])
+def test_validate_tenant_name_accepts(name):
+    tenants.validate_tenant_name(name)
@@ -0,0 +1,25 @@
+import os
+
+from volumes import seed_tree
+
+
+def test_seed_tree(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    (src / "db").mkdir(parents=True)
+    (src / "api").mkdir()
+    (src / "db" / "roles.sql").write_text("select 1;\n")
+    (src / "api" / "kong.yml").write_text("_format_version: '2.1'\n")
+    os.symlink("../api", src / "db" / "api_link")
+    os.symlink("roles.sql", src / "db" / "alias.sql")
+
+    stats = seed_tree(str(src), str(dst))
+
+    assert stats["hardlink"] == 1
+    assert stats["reflink"] + stats["copy"] == 1
+    assert stats["symlink"] == 2
+    assert os.path.samefile(src / "db" / "roles.sql", dst / "db" / "roles.sql")
+    assert os.readlink(dst / "db" / "api_link") == "../api"
+    assert (dst / "db" / "api_link" / "kong.yml").read_text() == "_format_version: '2.1'\n"
+
+    again = seed_tree(str(src), str(dst))
+    assert again == {"skipped": 4, "hardlink": 0, "reflink": 0, "copy": 0, "symlink": 0}
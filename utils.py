@@ -1,8 +1,5 @@
 import secrets
 import string
-import requests
-import json
-import time
 import subprocess
 import sys
 import os
@@ -0,0 +1,197 @@
+import time
+from typing import NamedTuple
+
+import numpy as np
+from psycopg import sql
+
+from db import connect
+
+
+# Операторы pgvector и классы операторов индексов для поддерживаемых метрик
+METRICS = {
+    "cosine": ("<=>", "vector_cosine_ops"),
+    "l2": ("<->", "vector_l2_ops"),
+    "ip": ("<#>", "vector_ip_ops"),
+}
+
+# Заголовок и признак конца потока COPY ... (FORMAT BINARY)
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+_COPY_TRAILER = (-1).to_bytes(2, "big", signed=True)
+
+
+class IndexSpec(NamedTuple):
+    kind: str  # hnsw, ivfflat или none
+    metric: str = "cosine"
+    m: int = 16
+    ef_construction: int = 64
+    ef_search: int = 40
+    lists: int = 100
+    probes: int = 10
+
+
+class ConcurrencyResult(NamedTuple):
+    concurrency: int
+    qps: float
+    p50_ms: float
+    p99_ms: float
+    recall: float
+
+
+def generate_dataset(rows: int, dim: int, queries: int, seed: int = 42):
+    """Синтетические эмбеддинги (нормированные float32) и запросы, воспроизводимые по seed."""
+    rng = np.random.default_rng(seed)
+    data = rng.standard_normal((rows, dim), dtype=np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    # Запросы - зашумленные точки набора, как реальные вопросы рядом с документами
+    picks = rng.integers(0, rows, size=queries)
+    query_vectors = data[picks] + rng.standard_normal((queries, dim), dtype=np.float32) * 0.5
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return data, query_vectors.astype(np.float32)
+
+
+def exact_top_k(data: np.ndarray, queries: np.ndarray, k: int, metric: str = "cosine", chunk: int = 256):
+    """Точные top-k идентификаторы (перебором в NumPy) - эталон для recall@k."""
+    result = np.empty((len(queries), k), dtype=np.int64)
+    sq_norms = (data * data).sum(axis=1) if metric == "l2" else None
+    for start in range(0, len(queries), chunk):
+        batch = queries[start:start + chunk]
+        scores = batch @ data.T  # Чем больше, тем ближе
+        if metric == "l2":
+            scores = 2 * scores - sq_norms  # -||x - q||^2 без постоянного слагаемого ||q||^2
+        elif metric == "cosine":
+            scores /= np.linalg.norm(data, axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+        result[start:start + len(batch)] = np.take_along_axis(top, order, axis=1)
+    return result
+
+
+def _copy_binary_chunk(ids: np.ndarray, vectors: np.ndarray) -> bytes:
+    """Строки (id bigint, embedding vector) в двоичном формате COPY, собранные одним массивом NumPy."""
+    dim = vectors.shape[1]
+    row = np.dtype([
+        ("fields", ">i2"), ("id_len", ">i4"), ("id", ">i8"),
+        ("vec_len", ">i4"), ("dim", ">i2"), ("unused", ">i2"), ("vec", ">f4", (dim,)),
+    ])
+    buf = np.empty(len(ids), dtype=row)
+    buf["fields"] = 2
+    buf["id_len"] = 8
+    buf["id"] = ids
+    buf["vec_len"] = 4 + 4 * dim
+    buf["dim"] = dim
+    buf["unused"] = 0
+    buf["vec"] = vectors
+    return buf.tobytes()
+
+
+def _vector_literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in vector) + "]"
+
+
+def load_vectors(dsn: str, table: str, data: np.ndarray, chunk: int = 10000) -> float:
+    """
+    Создает таблицу и загружает векторы через COPY (FORMAT BINARY). Возвращает время загрузки.
+    Существующую таблицу не трогает (ValueError): бенчмарк не должен затереть чужие данные.
+    """
+    ident = sql.Identifier(table)
+    started = time.perf_counter()
+    with connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (ident.as_string(conn),))
+        if cur.fetchone()[0] is not None:
+            raise ValueError(f"таблица {table} уже существует, выберите другое имя (--table) или удалите ее")
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        cur.execute(sql.SQL("CREATE TABLE {} (id bigint PRIMARY KEY, embedding vector({}) NOT NULL)").format(
+            ident, sql.Literal(data.shape[1])))
+        with cur.copy(sql.SQL("COPY {} (id, embedding) FROM STDIN (FORMAT BINARY)").format(ident)) as copy:
+            copy.write(_COPY_HEADER)
+            for start in range(0, len(data), chunk):
+                ids = np.arange(start, min(start + chunk, len(data)), dtype=np.int64)
+                copy.write(_copy_binary_chunk(ids, data[start:start + chunk]))
+            copy.write(_COPY_TRAILER)
+        cur.execute(sql.SQL("ANALYZE {}").format(ident))
+    return time.perf_counter() - started
+
+
+def build_index(dsn: str, table: str, spec: IndexSpec) -> tuple:
+    """
+    Строит индекс по spec. Возвращает (время построения, размер индекса в байтах).
+    Индекс с тем же именем (<table>_embedding_idx) уже может принадлежать другой таблице - ValueError.
+    """
+    if spec.kind == "none":
+        return 0.0, 0
+    opclass = METRICS[spec.metric][1]
+    if spec.kind == "hnsw":
+        options = f"m = {spec.m}, ef_construction = {spec.ef_construction}"
+    else:
+        options = f"lists = {spec.lists}"
+    index_name = sql.Identifier(f"{table}_embedding_idx")
+
+    with connect(dsn, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (index_name.as_string(conn),))
+        if cur.fetchone()[0] is not None:
+            raise ValueError(f"индекс {table}_embedding_idx уже существует, выберите другое имя (--table)")
+        started = time.perf_counter()
+        cur.execute(sql.SQL("CREATE INDEX {} ON {} USING {} (embedding {}) WITH ({})").format(
+            index_name, sql.Identifier(table), sql.SQL(spec.kind), sql.SQL(opclass), sql.SQL(options)))
+        elapsed = time.perf_counter() - started
+        cur.execute("SELECT pg_relation_size(%s::regclass)", (index_name.as_string(conn),))
+        size = cur.fetchone()[0]
+    return elapsed, size
+
+
+def run_queries(dsn: str, table: str, queries: np.ndarray, expected: np.ndarray, spec: IndexSpec,
+                k: int, batch_size: int, concurrency: int) -> ConcurrencyResult:
+    """
+    Выполняет все запросы пачками по batch_size (одна пачка - один round trip через LATERAL)
+    в concurrency параллельных соединениях и считает QPS, p50/p99 задержки пачки и recall@k.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    operator = METRICS[spec.metric][0]
+    query = sql.SQL(
+        "SELECT q.ord, d.id FROM unnest(%s::text[]) WITH ORDINALITY AS q(v, ord) "
+        "CROSS JOIN LATERAL (SELECT id FROM {} ORDER BY embedding {} q.v::vector LIMIT {}) d"
+    ).format(sql.Identifier(table), sql.SQL(operator), sql.Literal(k))
+    # Параметры поиска задаются через SET LOCAL: в транзакционном пулере сессия не сохраняется
+    settings = {"hnsw": f"SET LOCAL hnsw.ef_search = {spec.ef_search}",
+                "ivfflat": f"SET LOCAL ivfflat.probes = {spec.probes}"}.get(spec.kind)
+
+    literals = [_vector_literal(q) for q in queries]
+    batches = [range(start, min(start + batch_size, len(queries))) for start in range(0, len(queries), batch_size)]
+    found = np.full(expected.shape, -1, dtype=np.int64)
+
+    def worker(worker_batches):
+        latencies = []
+        with connect(dsn) as conn, conn.cursor() as cur:
+            for batch in worker_batches:
+                started = time.perf_counter()
+                with conn.transaction():
+                    if settings:
+                        cur.execute(settings)
+                    cur.execute(query, ([literals[i] for i in batch],))
+                    rows = cur.fetchall()
+                latencies.append(time.perf_counter() - started)
+                positions = {}
+                for ord_, doc_id in rows:
+                    query_index = batch[ord_ - 1]
+                    slot = positions.get(query_index, 0)
+                    if slot < k:
+                        found[query_index, slot] = doc_id
+                    positions[query_index] = slot + 1
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        chunks = [batches[i::concurrency] for i in range(concurrency)]
+        latencies = [value for result in executor.map(worker, chunks) for value in result]
+    elapsed = time.perf_counter() - started
+
+    recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, expected)])
+    latencies_ms = np.array(latencies) * 1000
+    return ConcurrencyResult(
+        concurrency=concurrency,
+        qps=len(queries) / elapsed,
+        p50_ms=float(np.percentile(latencies_ms, 50)),
+        p99_ms=float(np.percentile(latencies_ms, 99)),
+        recall=float(recall),
+    )
@@ -0,0 +1,138 @@
+import os
+import errno
+import shutil
+import fnmatch
+
+
+# Файлы томов Supabase, которые контейнеры только читают: их можно не копировать,
+# а создавать жесткие ссылки на файлы из склонированного репозитория.
+# Сгенерированные файлы (например db/jwt.sql) записываются атомарно через os.replace,
+# поэтому жесткая ссылка на исходный файл при рендеринге заменяется, а не перезаписывается.
+# Один inode общий для клона репозитория и томов всех тенантов, поэтому такие файлы монтируются
+# в compose только с общей меткой SELinux (:ro,z): приватная метка :Z при старте контейнера
+# перемаркировала бы inode и закрыла доступ базам других стеков.
+READ_ONLY_PATTERNS = (
+    "db/*.sql",
+    "db/init/*.sql",
+    "pooler/pooler.exs",
+)
+
+# ioctl FICLONE из linux/fs.h: клонирование файла (reflink) на btrfs, XFS, overlayfs и т.п.
+FICLONE = 0x40049409
+
+# Ошибки, означающие, что файловая система не поддерживает reflink/hardlink для этой пары файлов
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM, errno.ENOSYS}
+
+# Устройства (st_dev), на которых reflink уже не удался - не пытаемся повторно для каждого файла
+_NO_REFLINK_DEVICES = set()
+
+
+def _is_up_to_date(src_stat: os.stat_result, dst_path: str) -> bool:
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    if (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+        return True
+    return dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+
+def _reflink(src_path: str, dst_path: str, device: int) -> bool:
+    if device in _NO_REFLINK_DEVICES:
+        return False
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        _NO_REFLINK_DEVICES.add(device)
+        return False
+
+    try:
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError as e:
+        # Пустой (усеченный) файл не должен остаться в томе ни при откате на копирование, ни при ошибке
+        if os.path.lexists(dst_path):
+            os.unlink(dst_path)
+        if e.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+        _NO_REFLINK_DEVICES.add(device)
+        return False
+    shutil.copystat(src_path, dst_path)
+    return True
+
+
+def _hardlink(src_path: str, dst_path: str) -> bool:
+    try:
+        os.link(src_path, dst_path)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+        return False
+    return True
+
+
+def _copy_symlink(src_path: str, dst_path: str) -> bool:
+    """Воссоздает символическую ссылку с тем же содержимым. False, если она уже такая."""
+    target = os.readlink(src_path)
+    if os.path.islink(dst_path):
+        if os.readlink(dst_path) == target:
+            return False
+        os.unlink(dst_path)
+    elif os.path.isdir(dst_path):
+        return False  # Директория из прежнего наполнения (копией) - с данными, не трогаем
+    elif os.path.lexists(dst_path):
+        os.unlink(dst_path)
+    os.symlink(target, dst_path, target_is_directory=os.path.isdir(src_path))
+    return True
+
+
+def seed_tree(src_dir: str, dst_dir: str, read_only_patterns=READ_ONLY_PATTERNS) -> dict:
+    """
+    Наполняет dst_dir файлами из src_dir с минимальными затратами места и времени:
+    - файлы, не изменившиеся с прошлого раза (тот же inode или размер + mtime), пропускаются;
+    - read-only файлы (read_only_patterns) становятся жесткими ссылками на исходные;
+    - остальные клонируются через reflink (FICLONE), если файловая система это поддерживает;
+    - в остальных случаях файл копируется (shutil.copy2);
+    - символические ссылки (на файлы и директории) воссоздаются как есть, как copytree(symlinks=True).
+    Возвращает статистику {"skipped", "hardlink", "reflink", "copy", "symlink"}.
+    """
+    stats = {"skipped": 0, "hardlink": 0, "reflink": 0, "copy": 0, "symlink": 0}
+
+    for root, dirs, files in os.walk(src_dir):
+        rel_root = os.path.relpath(root, src_dir)
+        target_root = os.path.normpath(os.path.join(dst_dir, rel_root))
+        os.makedirs(target_root, exist_ok=True)
+
+        # os.walk не заходит в ссылки на директории, поэтому ссылки обрабатываются отдельно
+        links = {name for name in dirs + files if os.path.islink(os.path.join(root, name))}
+        for name in sorted(links):
+            if _copy_symlink(os.path.join(root, name), os.path.join(target_root, name)):
+                stats["symlink"] += 1
+            else:
+                stats["skipped"] += 1
+
+        for name in files:
+            if name in links:
+                continue
+            src_path = os.path.join(root, name)
+            dst_path = os.path.join(target_root, name)
+            rel_path = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+            src_stat = os.stat(src_path)
+
+            if _is_up_to_date(src_stat, dst_path):
+                stats["skipped"] += 1
+                continue
+            # Удаляем старую версию, а не пишем поверх: она может быть жесткой ссылкой на исходный файл
+            if os.path.lexists(dst_path):
+                os.unlink(dst_path)
+
+            if any(fnmatch.fnmatch(rel_path, pattern) for pattern in read_only_patterns) \
+                    and _hardlink(src_path, dst_path):
+                stats["hardlink"] += 1
+            elif _reflink(src_path, dst_path, src_stat.st_dev):
+                stats["reflink"] += 1
+            else:
+                shutil.copy2(src_path, dst_path)
+                stats["copy"] += 1
+
+    return stats